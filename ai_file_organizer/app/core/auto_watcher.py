@@ -6,18 +6,40 @@ Supports per-folder instructions and catch-up mode for files added while app was
 """
 
 import os
+import stat
+import heapq
 import shutil
 import logging
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set
 from collections import defaultdict
 
 from PySide6.QtCore import QObject, Signal, QTimer, QThread
 
 logger = logging.getLogger(__name__)
 
+# macOS system files that don't make a folder "non-empty"
+# (.DS_Store = Finder metadata, .localized = localized folder names)
+_SYSTEM_FILES = {'.DS_Store', '.localized'}
+
+# fd-relative directory walking (POSIX). Windows falls back to path-based scandir.
+_FD_WALK = os.scandir in os.supports_fd and os.open in os.supports_dir_fd
+_O_DIRECTORY = getattr(os, 'O_DIRECTORY', 0)
+_SUBDIR_OPEN_FLAGS = os.O_RDONLY | _O_DIRECTORY | getattr(os, 'O_NOFOLLOW', 0)
+
+
+def _folders_overlap(a: str, b: str) -> bool:
+    """True if a and b are the same folder or one contains the other."""
+    a = os.path.normcase(os.path.normpath(a))
+    b = os.path.normcase(os.path.normpath(b))
+    if a == b:
+        return True
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    # Compare on a separator boundary so /A doesn't contain /AB
+    return longer.startswith(shorter.rstrip(os.sep) + os.sep)
+
 
 class AutoWatcherWorker(QThread):
     """
@@ -435,6 +457,40 @@ class AutoOrganizeWatcher(QObject):
     status_changed = Signal(str)  # status message
     index_limit_reached = Signal(dict)  # monthly media-index limit hit (re-emitted from worker)
     
+    # Folders processed by background workers at the same time
+    MAX_CONCURRENT_WORKERS = 3
+    
+    # AI instruction templates, built once; _process_files_with_ai only fills
+    # in the per-call fields with str.format().
+    _TMPL_ASIS = (
+        "[AUTO-ORGANIZE - EXISTING FOLDERS ONLY]\n"
+        "User's instructions: {instruction}\n\n"
+        "EXISTING FOLDERS YOU CAN USE: {folders_list}\n\n"
+        "CRITICAL RULES:\n"
+        "1. You can ONLY use the folders listed above - DO NOT create any new folders\n"
+        "2. Move EVERY file to the most appropriate EXISTING folder based on file type/content\n"
+        "3. EVERY file MUST be included in your plan - put each file in the closest matching folder\n"
+        "4. Do NOT leave any files out - use your best judgment for the closest match\n"
+        "5. EVERY file_id in your response MUST go to one of the existing folders listed above"
+    )
+    _TMPL_INSTR = (
+        "[AUTO-ORGANIZE] User's specific instructions: {instruction}\n\n"
+        "PARENT FOLDER NAME: '{parent_folder_name}' - DO NOT create a folder with this name!\n\n"
+        "RULES FOR AUTO-ORGANIZE MODE:\n"
+        "1. FOLLOW the user's specific instructions EXACTLY\n"
+        "2. ONLY create folders that the user explicitly mentioned in their instructions - do NOT invent additional folders\n"
+        "3. EVERY file MUST be placed in one of the folders the user specified - put each file in the closest matching folder\n"
+        "4. IMPORTANT: Do NOT create a folder named '{parent_folder_name}' - use different names\n"
+        "5. If a file does not clearly match any folder the user mentioned, place it in whichever user-specified folder is the closest match"
+    )
+    _TMPL_DEFAULT = (
+        "[AUTO-ORGANIZE] Organize ALL files into logical folders based on file type and content.\n"
+        "PARENT FOLDER NAME: '{parent_folder_name}' - DO NOT create a folder with this name!\n\n"
+        "Use clear folder names like 'photos', 'docs', 'videos', 'audio', 'misc'.\n"
+        "IMPORTANT: Do NOT create a folder named '{parent_folder_name}' since that's the parent folder.\n"
+        "EVERY file MUST be placed in a folder - NO files left out."
+    )
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -456,18 +512,20 @@ class AutoOrganizeWatcher(QObject):
         
         # For catch-up mode: only organize files modified after this time
         self.catch_up_since: Optional[datetime] = None
+        # Catch-up skips files in folders whose own mtime predates catch_up_since
+        # (no file was added there). Turn off to also catch files edited in place.
+        self.catch_up_prune_folders = True
         
         # Internal state
         self._is_running = False
         self._pending_files: Dict[str, float] = {}  # path -> first_seen_time
+        # Min-heap of (ready_time, first_seen, path) so each check only touches files whose
+        # debounce window has elapsed. Entries no longer matching _pending_files are stale.
+        self._pending_heap: List[tuple] = []
         self._processed_files: Set[str] = set()
         self._file_check_timer: Optional[QTimer] = None
         self._debounce_seconds = 2.0  # Wait for file to stabilize
         
-        # Counter for periodic cleanup (every N checks)
-        self._check_count = 0
-        self._cleanup_interval = 10  # Run cleanup every 10 checks (~30 seconds)
-        
         # Files to ignore (system files, temp files, etc.)
         self._ignore_patterns = {
             '.DS_Store', 'Thumbs.db', 'desktop.ini', '.git', '.gitignore',
@@ -478,8 +536,11 @@ class AutoOrganizeWatcher(QObject):
             '.tmp', '.temp', '.crdownload', '.part', '.partial'
         }
         
-        # Background worker for file processing (prevents UI lag)
-        self._current_worker: Optional[AutoWatcherWorker] = None
+        # Background workers for file processing (prevents UI lag). Up to
+        # MAX_CONCURRENT_WORKERS folders are processed at once so AI round-trips
+        # and file moves for different folders overlap; a folder never has
+        # more than one worker.
+        self._active_workers: Set[AutoWatcherWorker] = set()
         # Queue stores (folder, instruction, existing_folders) - we re-scan folder when processing
         self._worker_queue: List[tuple] = []
         
@@ -544,6 +605,7 @@ class AutoOrganizeWatcher(QObject):
         self._is_running = True
         self._processed_files.clear()
         self._pending_files.clear()
+        self._pending_heap.clear()
 
         folder_count = len(self.watched_folders)
         self.status_changed.emit(f"Starting watch on {folder_count} folder(s)...")
@@ -601,14 +663,18 @@ class AutoOrganizeWatcher(QObject):
             self._full_scan_timer.stop()
             self._full_scan_timer = None
         
-        # Stop any running worker
-        if self._current_worker is not None and self._current_worker.isRunning():
-            logger.info("Stopping background worker...")
-            self._current_worker.stop()
-            self._current_worker.wait(3000)  # Wait up to 3 seconds
+        # Stop any running workers
+        running = [w for w in self._active_workers if w.isRunning()]
+        if running:
+            logger.info(f"Stopping {len(running)} background worker(s)...")
+            for worker in running:
+                worker.stop()
+            for worker in running:
+                worker.wait(3000)  # Wait up to 3 seconds each
         
         # Clear queues
         self._pending_files.clear()
+        self._pending_heap.clear()
         self._worker_queue.clear()
         
         self.status_changed.emit("Watcher stopped")
@@ -705,45 +771,150 @@ class AutoOrganizeWatcher(QObject):
         instruction.
         """
         removed_count = 0
-        root_folder = os.path.normpath(root_folder)
         protected = {n.lower() for n in (protected_names or set())}
 
-        # Walk bottom-up to remove nested empty folders
-        for dirpath, dirnames, filenames in os.walk(root_folder, topdown=False):
-            # Skip the root folder itself (normalize for comparison)
-            if os.path.normpath(dirpath) == root_folder:
-                continue
+        # Post-order walk so nested empty folders are removed before their parents
+        for kind, path, child_count in self._iter_files(root_folder, dir_events=True):
+            if kind == 'dir_end' and self._remove_if_empty(path, child_count, protected):
+                removed_count += 1
 
-            # Skip hidden folders
-            if os.path.basename(dirpath).startswith('.'):
-                continue
+        return removed_count
 
-            # Skip folders the user explicitly named in their instruction
-            if os.path.basename(dirpath).lower() in protected:
-                continue
+    def _remove_if_empty(self, dirpath: str, child_count: int, protected: set) -> bool:
+        """Remove a folder reported empty by a 'dir_end' sentinel of _iter_files.
+
+        Args:
+            dirpath: Folder to remove
+            child_count: Entries left in the folder (system files excluded)
+            protected: Lowercased folder names that must never be deleted
+
+        Returns:
+            True if the folder was removed
+        """
+        if child_count:
+            return False
+
+        # Skip folders the user explicitly named in their instruction
+        if os.path.basename(dirpath).lower() in protected:
+            return False
+
+        try:
+            # Delete any remaining system files first
+            for sys_file in _SYSTEM_FILES:
+                sys_path = os.path.join(dirpath, sys_file)
+                if os.path.exists(sys_path):
+                    try:
+                        os.remove(sys_path)
+                    except OSError:
+                        pass  # Ignore if can't delete system file
+            # Now remove the empty folder
+            os.rmdir(dirpath)
+            logger.info(f"Removed empty folder: {dirpath}")
+            return True
+        except OSError as e:
+            logger.debug(f"Could not remove folder {dirpath}: {e}")
+            return False
+
+    def _iter_files(self, root_folder: str, dir_events: bool = False,
+                    modified_since: Optional[float] = None) -> Iterator[tuple]:
+        """Walk a folder tree with os.scandir, skipping hidden directories.
+
+        Yields ('file', path, entry) for every file. When dir_events is True,
+        each subfolder is also reported once all of its entries have been
+        yielded, as a ('dir_end', path, child_count) sentinel (post-order, so
+        children come before parents). child_count is the number of entries
+        still in the folder at that point, ignoring macOS system files and
+        any subfolders the consumer already removed. The root folder itself
+        is never reported.
+
+        If modified_since (epoch seconds) is given, files are not yielded from
+        folders whose own mtime is older: nothing has been added, removed or
+        renamed in them since then. Their subfolders are still walked, because
+        a folder's mtime doesn't change when something deeper down does.
+
+        Use the yielded path rather than entry.path, and consume each entry
+        before advancing the generator (its directory fd is closed after).
+        """
+        yield from self._walk_dir(os.path.normpath(root_folder), dir_events, modified_since, is_root=True)
+
+    def _walk_dir(self, dirpath: str, dir_events: bool, modified_since: Optional[float] = None,
+                  is_root: bool = False, parent_fd: Optional[int] = None) -> Iterator[tuple]:
+        """Recursive step of _iter_files for a single directory.
+
+        On POSIX each directory is opened relative to its parent's file
+        descriptor (like os.fwalk), so the kernel resolves one path component
+        per folder and DirEntry.stat() calls are fd-relative instead of
+        re-walking the full path from the root.
+        """
+        dir_fd = None
+        try:
+            if _FD_WALK:
+                if parent_fd is None:
+                    dir_fd = os.open(dirpath, os.O_RDONLY | _O_DIRECTORY)
+                else:
+                    dir_fd = os.open(os.path.basename(dirpath), _SUBDIR_OPEN_FLAGS, dir_fd=parent_fd)
+                scan_target = dir_fd
+            else:
+                scan_target = dirpath
+            with os.scandir(scan_target) as it:
+                entries = list(it)
+            # Folder untouched since the cutoff - none of its files can be new arrivals
+            skip_files = False
+            if modified_since is not None:
+                dir_stat = os.fstat(dir_fd) if dir_fd is not None else os.stat(dirpath)
+                skip_files = dir_stat.st_mtime < modified_since
+        except OSError as e:
+            if dir_fd is not None:
+                os.close(dir_fd)
+            logger.debug(f"Could not scan {dirpath}: {e}")
+            return
+
+        try:
+            subdirs = []
+            child_count = 0
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                # entry.path is only the name when scanning by fd
+                entry_path = os.path.join(dirpath, entry.name)
+                if is_dir:
+                    # Hidden and symlinked folders are never descended into
+                    if entry.name.startswith('.') or entry.is_symlink():
+                        child_count += 1
+                    else:
+                        subdirs.append(entry_path)
+                    continue
+
+                if entry.name not in _SYSTEM_FILES:
+                    child_count += 1
+                if not skip_files:
+                    yield ('file', entry_path, entry)
+
+            for subdir in subdirs:
+                yield from self._walk_dir(subdir, dir_events, modified_since, parent_fd=dir_fd)
+
+            if dir_events and not is_root:
+                # Subfolders removed by the consumer while unwinding no longer count
+                child_count += sum(1 for subdir in subdirs if self._dir_exists(subdir, dir_fd))
+                yield ('dir_end', dirpath, child_count)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+    @staticmethod
+    def _dir_exists(dirpath: str, parent_fd: Optional[int]) -> bool:
+        """os.path.isdir that resolves the name relative to parent_fd when given."""
+        if parent_fd is None:
+            return os.path.isdir(dirpath)
+        try:
+            st = os.stat(os.path.basename(dirpath), dir_fd=parent_fd, follow_symlinks=False)
+        except OSError:
+            return False
+        return stat.S_ISDIR(st.st_mode)
 
-            try:
-                # Check if folder is empty (ignoring macOS system files)
-                # .DS_Store = Finder metadata, .localized = localized folder names
-                contents = [f for f in os.listdir(dirpath) if f not in {'.DS_Store', '.localized'}]
-                if not contents:
-                    # Delete any remaining system files first
-                    for sys_file in ['.DS_Store', '.localized']:
-                        sys_path = os.path.join(dirpath, sys_file)
-                        if os.path.exists(sys_path):
-                            try:
-                                os.remove(sys_path)
-                            except OSError:
-                                pass  # Ignore if can't delete system file
-                    # Now remove the empty folder
-                    os.rmdir(dirpath)
-                    removed_count += 1
-                    logger.info(f"Removed empty folder: {dirpath}")
-            except OSError as e:
-                logger.debug(f"Could not remove folder {dirpath}: {e}")
-        
-        return removed_count
-    
     def _should_ignore(self, file_path: str) -> bool:
         """Check if a file should be ignored.
         
@@ -956,7 +1127,13 @@ class AutoOrganizeWatcher(QObject):
         """
         from app.core.settings import settings
         
-        all_files = []
+        # Files grouped by their source folder as they're found
+        files_by_folder: Dict[str, List[str]] = defaultdict(list)
+        total_files = 0
+        catch_up_epoch = (
+            self.catch_up_since.timestamp()
+            if self.catch_up_since and self.catch_up_prune_folders else None
+        )
 
         for folder in self.watched_folders:
             folder = os.path.normpath(folder)
@@ -972,40 +1149,30 @@ class AutoOrganizeWatcher(QObject):
                 logger.info(f"Skipping existing files in {folder} (Organize New Only mode)")
                 continue
 
-            # Get ALL files in this folder AND subfolders
-            for root, dirs, files in os.walk(folder):
-                # Skip hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
-
-                for item in files:
-                    item_path = os.path.join(root, item)
-
-                    # Check with full path so pinned files are properly detected
-                    if self._should_ignore(item_path):
-                        continue
+            # Get ALL files in this folder AND subfolders (hidden dirs skipped)
+            for _, item_path, entry in self._iter_files(folder, modified_since=catch_up_epoch):
+                # Check with full path so pinned files are properly detected
+                if self._should_ignore(item_path):
+                    continue
 
-                    # Check catch-up filter
-                    if self.catch_up_since:
-                        try:
-                            mtime = datetime.fromtimestamp(os.path.getmtime(item_path))
-                            if mtime < self.catch_up_since:
-                                continue  # Skip files older than catch-up time
-                        except Exception:
-                            pass
+                # Check catch-up filter (DirEntry caches its stat result)
+                if self.catch_up_since:
+                    try:
+                        mtime = datetime.fromtimestamp(entry.stat().st_mtime)
+                        if mtime < self.catch_up_since:
+                            continue  # Skip files older than catch-up time
+                    except Exception:
+                        pass
 
-                    all_files.append((item_path, folder))
+                files_by_folder[folder].append(item_path)
+                total_files += 1
         
-        if not all_files:
+        if not total_files:
             self.status_changed.emit("No existing files to organize")
             return
         
-        self.status_changed.emit(f"Organizing {len(all_files)} existing files...")
-        logger.info(f"Found {len(all_files)} existing files to organize")
-        
-        # Group files by their source folder
-        files_by_folder: Dict[str, List[str]] = defaultdict(list)
-        for file_path, folder in all_files:
-            files_by_folder[folder].append(file_path)
+        self.status_changed.emit(f"Organizing {total_files} existing files...")
+        logger.info(f"Found {total_files} existing files to organize")
         
         # Process each folder with its instruction
         ORGANIZE_AS_IS = 2
@@ -1107,8 +1274,10 @@ class AutoOrganizeWatcher(QObject):
             self.status_changed.emit("No folders selected for organizing")
             return
         
-        # Step 2: Collect files from selected folders and track existing subfolders for "Organize As-Is"
-        all_files = []
+        # Step 2: Collect files from selected folders (grouped by source folder as
+        # they're found) and track existing subfolders for "Organize As-Is"
+        files_by_folder: Dict[str, List[str]] = defaultdict(list)
+        total_files = 0
         existing_folders_by_parent: Dict[str, List[str]] = {}  # folder -> list of existing subfolders
         
         for folder in folders_to_organize:  # Only for "Organize As-Is" folders
@@ -1126,31 +1295,21 @@ class AutoOrganizeWatcher(QObject):
             if not os.path.isdir(folder):
                 continue
             
-            # Get ALL files in this folder AND subfolders
-            for root, dirs, files in os.walk(folder):
-                # Skip hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
+            # Get ALL files in this folder AND subfolders (hidden dirs skipped)
+            for _, item_path, entry in self._iter_files(folder):
+                # Check with full path so pinned files are properly detected
+                if self._should_ignore(item_path):
+                    continue
                 
-                for item in files:
-                    item_path = os.path.join(root, item)
-                    
-                    # Check with full path so pinned files are properly detected
-                    if self._should_ignore(item_path):
-                        continue
-                    
-                    all_files.append((item_path, folder))
+                files_by_folder[folder].append(item_path)
+                total_files += 1
         
-        if not all_files:
+        if not total_files:
             self.status_changed.emit("No files to organize in selected folders")
             return
         
-        self.status_changed.emit(f"Organizing {len(all_files)} files from {len(all_folders_to_organize)} folder(s)...")
-        logger.info(f"Per-folder organize: {len(all_files)} files from {len(all_folders_to_organize)} folders")
-        
-        # Group files by their source folder
-        files_by_folder: Dict[str, List[str]] = defaultdict(list)
-        for file_path, folder in all_files:
-            files_by_folder[folder].append(file_path)
+        self.status_changed.emit(f"Organizing {total_files} files from {len(all_folders_to_organize)} folder(s)...")
+        logger.info(f"Per-folder organize: {total_files} files from {len(all_folders_to_organize)} folders")
         
         # Process each folder with its instruction
         for folder, files in files_by_folder.items():
@@ -1198,22 +1357,16 @@ class AutoOrganizeWatcher(QObject):
         # Step 3: Collect files from this folder
         all_files = []
         pinned_count = 0
-        for root, dirs, files in os.walk(folder_path):
-            # Skip hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for _, item_path, entry in self._iter_files(folder_path):
+            # Check with full path so pinned files are properly detected
+            if self._should_ignore(item_path):
+                from app.core.settings import settings
+                if settings.is_pinned(item_path):
+                    pinned_count += 1
+                    logger.info(f"Skipping pinned file: {item_path}")
+                continue
             
-            for item in files:
-                item_path = os.path.join(root, item)
-                
-                # Check with full path so pinned files are properly detected
-                if self._should_ignore(item_path):
-                    from app.core.settings import settings
-                    if settings.is_pinned(item_path):
-                        pinned_count += 1
-                        logger.info(f"Skipping pinned file: {item_path}")
-                    continue
-                
-                all_files.append(item_path)
+            all_files.append(item_path)
         
         if pinned_count > 0:
             logger.info(f"Skipped {pinned_count} pinned file(s)")
@@ -1245,34 +1398,28 @@ class AutoOrganizeWatcher(QObject):
         
         current_time = time.time()
         
-        # Periodic cleanup of empty folders
-        self._check_count += 1
-        if self._check_count >= self._cleanup_interval:
-            self._check_count = 0
-            for folder in self.watched_folders:
-                folder = os.path.normpath(folder)
-                if os.path.isdir(folder):
-                    protected = set(self._extract_named_folders(self._get_instruction_for_folder(folder)))
-                    deleted = self._cleanup_empty_folders(folder, protected)
-                    if deleted > 0:
-                        logger.info(f"Periodic cleanup: removed {deleted} empty folder(s)")
-        
         # Get currently indexed paths from database for validation
         from app.core.database import file_index
         indexed_paths = file_index.get_indexed_file_paths()
         
+        # Files that passed the filters this check: path -> watched folder
+        candidates: Dict[str, str] = {}
+        
         for folder in self.watched_folders:
             folder = os.path.normpath(folder)
             if not os.path.isdir(folder):
                 continue
             
             try:
-                for item in os.listdir(folder):
-                    item_path = os.path.join(folder, item)
+                with os.scandir(folder) as it:
+                    entries = list(it)
+                for entry in entries:
+                    item_path = os.path.join(folder, entry.name)
                     # Use lowercase for case-insensitive comparison (macOS)
                     normalized_path = os.path.normpath(item_path).lower()
                     
-                    if not os.path.isfile(item_path):
+                    # DirEntry answers from the directory listing, no extra stat
+                    if not entry.is_file():
                         continue
 
                     # Check with full path so pinned files are properly detected
@@ -1296,28 +1443,44 @@ class AutoOrganizeWatcher(QObject):
                             logger.info(f"File removed from DB, will re-index: {os.path.basename(item_path)}")
                     
                     # Track pending files for debounce
+                    candidates[item_path] = folder
                     if item_path not in self._pending_files:
                         self._pending_files[item_path] = current_time
+                        heapq.heappush(
+                            self._pending_heap,
+                            (current_time + self._debounce_seconds, current_time, item_path),
+                        )
                         logger.debug(f"New file detected: {item_path}")
-                    else:
-                        # Check if file has been stable long enough
-                        first_seen = self._pending_files[item_path]
-                        if current_time - first_seen >= self._debounce_seconds:
-                            # File is stable, process it
-                            instruction = self._get_instruction_for_folder(folder)
-                            existing_folders = self._get_existing_folders_if_as_is(folder)
-                            self._process_files_with_ai([item_path], folder, instruction, existing_folders)
-                            self._pending_files.pop(item_path, None)
                             
             except Exception as e:
                 logger.error(f"Error checking folder {folder}: {e}")
+        
+        # Process files that have been stable long enough (earliest first)
+        while self._pending_heap and self._pending_heap[0][0] <= current_time:
+            _, first_seen, item_path = heapq.heappop(self._pending_heap)
+            if self._pending_files.get(item_path) != first_seen:
+                continue  # Stale entry
+            
+            self._pending_files.pop(item_path, None)
+            folder = candidates.get(item_path)
+            if folder is None:
+                # File vanished or is now ignored/processed - stop tracking it
+                continue
+            
+            try:
+                instruction = self._get_instruction_for_folder(folder)
+                existing_folders = self._get_existing_folders_if_as_is(folder)
+                self._process_files_with_ai([item_path], folder, instruction, existing_folders)
+            except Exception as e:
+                logger.error(f"Error processing new file {item_path}: {e}")
     
     def _periodic_full_scan(self) -> None:
         """
         Periodic full scan of watched folders.
         - For "Organize New Only" (action=3): Only scans ROOT folder files
         - For other modes: Scans ALL files including subfolders
-        Checks if any files are missing from the database and queues them for indexing.
+        Checks if any files are missing from the database and queues them for indexing,
+        and removes empty subfolders in the same pass.
         Called every 60 seconds and once on startup.
         """
         if not self._is_running:
@@ -1344,52 +1507,45 @@ class AutoOrganizeWatcher(QObject):
                 # Get the action for this folder (1=Reorganize All, 2=As-Is, 3=Organize New Only)
                 from app.core.settings import settings
                 folder_action = settings.get_auto_organize_action(folder)
+                protected = {
+                    n.lower() for n in self._extract_named_folders(self._get_instruction_for_folder(folder))
+                }
+                removed_folders = 0
                 
-                if folder_action == 3:
-                    # ORGANIZE NEW ONLY: Only scan files in the ROOT folder, not subfolders
-                    # This preserves existing folder structure
-                    for item in os.listdir(folder):
-                        file_path = os.path.join(folder, item)
-                        if not os.path.isfile(file_path):
-                            continue  # Skip directories
-                        
-                        normalized_path = os.path.normpath(file_path).lower()
-                        total_scanned += 1
-                        
-                        if self._should_ignore(file_path):
-                            continue
-                        # Files we've decided to leave in place — skip entirely
-                        if normalized_path in self._left_in_place_paths:
-                            continue
-                        if file_path in self._processed_files:
-                            continue
-                        if normalized_path not in indexed_paths:
-                            unindexed_files_by_folder[folder].append(file_path)
-                            total_unindexed += 1
-                else:
-                    # REORGANIZE ALL or ORGANIZE AS-IS: Scan ALL files including subfolders
-                    for root, dirs, files in os.walk(folder):
-                        # Skip hidden directories
-                        dirs[:] = [d for d in dirs if not d.startswith('.')]
-                        
-                        for file_name in files:
-                            file_path = os.path.join(root, file_name)
-                            # Use lowercase for case-insensitive comparison (macOS)
-                            normalized_path = os.path.normpath(file_path).lower()
-                            total_scanned += 1
-                            
-                            # Skip ignored files
-                            if self._should_ignore(file_path):
-                                continue
-                            
-                            # Skip files already being processed
-                            if file_path in self._processed_files:
-                                continue
-                            
-                            # Check if file is NOT in database (case-insensitive)
-                            if normalized_path not in indexed_paths:
-                                unindexed_files_by_folder[folder].append(file_path)
-                                total_unindexed += 1
+                # One post-order walk both finds unindexed files and removes
+                # folders left empty, instead of a separate cleanup traversal
+                for kind, file_path, value in self._iter_files(folder, dir_events=True):
+                    if kind == 'dir_end':
+                        if self._remove_if_empty(file_path, value, protected):
+                            removed_folders += 1
+                        continue
+                    
+                    # ORGANIZE NEW ONLY: Only pick up files in the ROOT folder, not
+                    # subfolders. This preserves existing folder structure
+                    if folder_action == 3 and os.path.dirname(file_path) != folder:
+                        continue
+                    
+                    # Use lowercase for case-insensitive comparison (macOS)
+                    normalized_path = os.path.normpath(file_path).lower()
+                    total_scanned += 1
+                    
+                    # Skip ignored files
+                    if self._should_ignore(file_path):
+                        continue
+                    # Files we've decided to leave in place — skip entirely
+                    if normalized_path in self._left_in_place_paths:
+                        continue
+                    # Skip files already being processed
+                    if file_path in self._processed_files:
+                        continue
+                    
+                    # Check if file is NOT in database (case-insensitive)
+                    if normalized_path not in indexed_paths:
+                        unindexed_files_by_folder[folder].append(file_path)
+                        total_unindexed += 1
+                
+                if removed_folders > 0:
+                    logger.info(f"[FullScan] Removed {removed_folders} empty folder(s) in {os.path.basename(folder)}")
                             
             except Exception as e:
                 logger.error(f"[FullScan] Error scanning folder {folder}: {e}")
@@ -1431,47 +1587,26 @@ class AutoOrganizeWatcher(QObject):
         if not file_paths:
             return
 
-        # Build full instruction for AI
+        # Build full instruction for AI from the prebuilt templates
         parent_folder_name = os.path.basename(folder).lower()
         
         if existing_folders is not None and len(existing_folders) > 0:
             # ORGANIZE AS-IS MODE: Only use existing folders
-            folders_list = ', '.join(f"'{f}'" for f in existing_folders)
-            full_instruction = (
-                f"[AUTO-ORGANIZE - EXISTING FOLDERS ONLY]\n"
-                f"User's instructions: {instruction if instruction else 'Organize files into appropriate folders'}\n\n"
-                f"EXISTING FOLDERS YOU CAN USE: {folders_list}\n\n"
-                "CRITICAL RULES:\n"
-                "1. You can ONLY use the folders listed above - DO NOT create any new folders\n"
-                "2. Move EVERY file to the most appropriate EXISTING folder based on file type/content\n"
-                "3. EVERY file MUST be included in your plan - put each file in the closest matching folder\n"
-                "4. Do NOT leave any files out - use your best judgment for the closest match\n"
-                "5. EVERY file_id in your response MUST go to one of the existing folders listed above"
+            full_instruction = self._TMPL_ASIS.format(
+                instruction=instruction if instruction else 'Organize files into appropriate folders',
+                folders_list=', '.join(f"'{f}'" for f in existing_folders),
             )
             logger.info(f"[Worker] Organize As-Is mode: restricting to folders: {existing_folders}")
         elif instruction:
-            full_instruction = (
-                f"[AUTO-ORGANIZE] User's specific instructions: {instruction}\n\n"
-                f"PARENT FOLDER NAME: '{parent_folder_name}' - DO NOT create a folder with this name!\n\n"
-                "RULES FOR AUTO-ORGANIZE MODE:\n"
-                "1. FOLLOW the user's specific instructions EXACTLY\n"
-                "2. ONLY create folders that the user explicitly mentioned in their instructions - do NOT invent additional folders\n"
-                "3. EVERY file MUST be placed in one of the folders the user specified - put each file in the closest matching folder\n"
-                f"4. IMPORTANT: Do NOT create a folder named '{parent_folder_name}' - use different names\n"
-                "5. If a file does not clearly match any folder the user mentioned, place it in whichever user-specified folder is the closest match"
+            full_instruction = self._TMPL_INSTR.format(
+                instruction=instruction, parent_folder_name=parent_folder_name
             )
         else:
-            full_instruction = (
-                f"[AUTO-ORGANIZE] Organize ALL files into logical folders based on file type and content.\n"
-                f"PARENT FOLDER NAME: '{parent_folder_name}' - DO NOT create a folder with this name!\n\n"
-                "Use clear folder names like 'photos', 'docs', 'videos', 'audio', 'misc'.\n"
-                f"IMPORTANT: Do NOT create a folder named '{parent_folder_name}' since that's the parent folder.\n"
-                "EVERY file MUST be placed in a folder - NO files left out."
-            )
+            full_instruction = self._TMPL_DEFAULT.format(parent_folder_name=parent_folder_name)
         
-        # If a worker is already running, queue this request
-        # Store folder info instead of file paths - we'll re-scan when processing
-        if self._current_worker is not None and self._current_worker.isRunning():
+        # If this folder already has a worker or all worker slots are busy, queue
+        # this request. Store folder info instead of file paths - we'll re-scan when processing
+        if self._folder_has_worker(folder) or len(self._active_workers) >= self.MAX_CONCURRENT_WORKERS:
             # Don't add duplicate entries for the same folder
             folder_normalized = os.path.normpath(folder)
             already_queued = any(
@@ -1493,26 +1628,43 @@ class AutoOrganizeWatcher(QObject):
         """Start a background worker to process files."""
         logger.info(f"Starting background worker for {len(file_paths)} files")
         
-        self._current_worker = AutoWatcherWorker(
+        worker = AutoWatcherWorker(
             file_paths, folder, instruction, self.folder_instructions, existing_folders
         )
         
         # Connect worker signals to our signals
-        self._current_worker.file_indexed.connect(self._on_worker_file_indexed)
-        self._current_worker.file_organized.connect(self._on_worker_file_organized)
-        self._current_worker.status_changed.connect(self._on_worker_status)
-        self._current_worker.error_occurred.connect(self._on_worker_error)
-        self._current_worker.finished_processing.connect(self._on_worker_finished_with_files)
-        self._current_worker.index_limit_reached.connect(self.index_limit_reached)
-
-        self._current_worker.start()
+        worker.file_indexed.connect(self._on_worker_file_indexed)
+        worker.file_organized.connect(self._on_worker_file_organized)
+        worker.status_changed.connect(self._on_worker_status)
+        worker.error_occurred.connect(self._on_worker_error)
+        worker.finished_processing.connect(self._on_worker_finished_with_files)
+        worker.index_limit_reached.connect(self.index_limit_reached)
+        # The worker stays in _active_workers (keeping it alive) until its thread
+        # has actually exited; only then is its slot handed to the queue.
+        worker.finished.connect(self._on_worker_thread_finished)
+
+        self._active_workers.add(worker)
+        worker.start()
+    
+    def _folder_has_worker(self, folder: str) -> bool:
+        """Check if a background worker is processing this folder, a folder
+        inside it, or a folder containing it.
+
+        Workers scan their folder's subfolders too, so overlapping folders
+        would otherwise have two workers moving the same files.
+        """
+        return any(_folders_overlap(folder, w.folder) for w in self._active_workers)
     
     def _on_worker_file_indexed(self, file_path: str):
         """Handle file indexed from worker."""
         self.file_indexed.emit(file_path)
     
     def _on_worker_file_organized(self, source: str, dest: str, category: str):
-        """Handle file organized from worker."""
+        """Handle file organized from worker.
+
+        This is the only place file_organized is emitted; _execute_plan
+        routes its moves through here too.
+        """
         self._processed_files.add(source)
         self._processed_files.add(dest)
         # Track the destination as an organized file (prevents re-processing)
@@ -1529,22 +1681,37 @@ class AutoOrganizeWatcher(QObject):
     
     def _on_worker_finished_with_files(self, processed_files: list):
         """Handle worker finished with list of processed files."""
-        # Add all processed files to _organized_files to prevent re-processing
+        # Add all processed files to _organized_files to prevent re-processing.
+        # Worker signals are delivered on the main thread, so concurrent workers
+        # never update these sets at the same time.
         for file_path in processed_files:
             self._organized_files.add(os.path.normpath(file_path))
         
         logger.info(f"Worker finished, marked {len(processed_files)} files as organized")
+    
+    def _on_worker_thread_finished(self):
+        """Handle a worker thread exiting - free its slot and process the queue."""
+        worker = self.sender()
+        self._active_workers.discard(worker)
+        if worker is not None:
+            worker.deleteLater()
         
         # Continue with regular finish handling
         self._on_worker_finished()
     
     def _on_worker_finished(self):
-        """Handle worker finished - process queue if any."""
+        """Handle worker finished - process queue while worker slots are free."""
         logger.info("Worker finished processing")
         
-        # Process next item in queue if any
-        if self._worker_queue:
-            folder, instruction, existing_folders = self._worker_queue.pop(0)
+        while self._worker_queue and len(self._active_workers) < self.MAX_CONCURRENT_WORKERS:
+            # Next queued folder that doesn't already have a worker running
+            next_index = next(
+                (i for i, (f, _, _) in enumerate(self._worker_queue) if not self._folder_has_worker(f)),
+                None
+            )
+            if next_index is None:
+                break
+            folder, instruction, existing_folders = self._worker_queue.pop(next_index)
             
             # RE-SCAN the folder to get fresh file paths (not stale ones from before)
             # This also filters out files already in _organized_files
@@ -1564,12 +1731,8 @@ class AutoOrganizeWatcher(QObject):
                     (f, i, e) for f, i, e in self._worker_queue 
                     if os.path.normpath(f) != os.path.normpath(folder)
                 ]
-                # Process next in queue if any remain
-                if self._worker_queue:
-                    self._on_worker_finished()
-                else:
-                    self.status_changed.emit(f"Watching {len(self.watched_folders)} folder(s) for new files...")
-        else:
+        
+        if not self._active_workers and not self._worker_queue:
             # All done - update status
             self.status_changed.emit(f"Watching {len(self.watched_folders)} folder(s) for new files...")
     
@@ -1588,24 +1751,21 @@ class AutoOrganizeWatcher(QObject):
         if not os.path.isdir(folder):
             return file_paths
         
-        for root, dirs, files in os.walk(folder):
-            # Skip hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
+        # Nothing to exclude if no file has been organized yet
+        organized = self._organized_files if exclude_organized else None
+        
+        for _, item_path, entry in self._iter_files(folder):
+            # Check with full path so pinned files are properly detected
+            if self._should_ignore(item_path):
+                continue
             
-            for item in files:
-                item_path = os.path.join(root, item)
-                
-                # Check with full path so pinned files are properly detected
-                if self._should_ignore(item_path):
-                    continue
-                
-                # Skip files that have already been organized (prevents loops)
-                if exclude_organized:
-                    normalized_path = os.path.normpath(item_path)
-                    if normalized_path in self._organized_files:
-                        continue
-                
-                file_paths.append(item_path)
+            # Skip files that have already been organized (prevents loops).
+            # _iter_files joins names onto the normalized root, so its paths are
+            # already in normpath form and can be probed directly.
+            if organized and item_path in organized:
+                continue
+            
+            file_paths.append(item_path)
         
         return file_paths
     
@@ -1664,13 +1824,11 @@ class AutoOrganizeWatcher(QObject):
                     # Move the file
                     shutil.move(source_path, dest_path)
                     moved_count += 1
-                    
-                    # Track as processed
-                    self._processed_files.add(source_path)
-                    self._processed_files.add(dest_path)
-                    
                     logger.info(f"Organized: {source_path} -> {dest_path}")
-                    self.file_organized.emit(source_path, dest_path, folder_name)
+                    
+                    # Track as processed and emit file_organized through the same
+                    # slot the worker uses, so each move is signalled exactly once
+                    self._on_worker_file_organized(source_path, dest_path, folder_name)
                     
                     # Update pinned path if this file was pinned
                     from app.core.settings import settings
@@ -2,13 +2,63 @@
 File categorization logic using heuristics (extension and MIME type).
 """
 
+import logging
+import os
+import stat as _stat
+import mimetypes
 import filetype
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, List, Optional, Union
 from .settings import settings
 from .ocr import extract_text_from_file, get_supported_formats
 
 
+logger = logging.getLogger(__name__)
+
+
+# Magic-byte signatures that identify a file type on their own, checked
+# before falling back to filetype.guess(). Each maps to the MIME type
+# filetype itself reports for that signature, so results are unchanged.
+# No signature is a prefix of another, so they are ordered by how common
+# the type is in a typical folder to end the scan early.
+_MAGIC_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"%PDF", "application/pdf"),
+    (b"ID3", "audio/mpeg"),
+    (b"GIF", "image/gif"),
+    (b"\xef\xbb\xbf%PDF", "application/pdf"),  # PDF with UTF-8 BOM
+)
+# Read as much of the header as filetype inspects, so the same buffer can
+# be handed to filetype instead of letting it open the file a second time
+_MAGIC_READ_SIZE = 8192
+_MAGIC_OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+
+# OCR-capable extensions, built once instead of per file
+_OCR_SUPPORTED = frozenset(get_supported_formats())
+
+
+def reload_settings() -> None:
+    """
+    Rebind the category lookup tables from settings.
+    
+    The per-file path reads these module globals rather than going through
+    settings attributes for every file. Call this after changing
+    settings.category_map or settings.mime_fallbacks.
+    """
+    global _EXTENSION_INDEX, _TRUSTED_EXTENSIONS, _MIME_FALLBACKS, _MIME_PATTERN
+    settings.rebuild_category_index()
+    _EXTENSION_INDEX, _TRUSTED_EXTENSIONS, _MIME_FALLBACKS, _MIME_PATTERN = (
+        settings.extension_index,
+        settings.trusted_extensions,
+        settings.mime_fallback_items,
+        settings.mime_fallback_pattern,
+    )
+
+
+reload_settings()
+
+
 def categorize_file(file_path: Path) -> str:
     """
     Categorize a file based on its extension and MIME type.
@@ -20,18 +70,78 @@ def categorize_file(file_path: Path) -> str:
         Category string (e.g., "Documents/PDFs", "Images/Photos")
     """
     # First, try extension-based categorization
-    extension = file_path.suffix.lower()
-    category = _categorize_by_extension(extension)
+    category = _categorize_by_suffix(file_path.suffix)
     
     if category and category != "Misc":
         return category
     
     # Fallback to MIME type detection
-    category = _categorize_by_mime(file_path)
+    category = _categorize_by_mime(str(file_path))
     
     return category or "Misc"
 
 
+def categorize_names(names: Iterable[str]) -> List[str]:
+    """
+    Categorize many files at once, e.g. from a list of paths or a manifest.
+    
+    Known extensions are resolved in one pass over the names with no disk
+    access; only names whose extension isn't mapped go through
+    categorize_file's MIME detection (which yields "Misc" for paths that
+    don't exist).
+    
+    Args:
+        names: File names or paths
+        
+    Returns:
+        Category strings in the same order as names
+    """
+    names = list(names)
+    index_get = _EXTENSION_INDEX.get
+    categories = [index_get(_suffix(os.path.basename(name)).lower()) for name in names]
+    
+    for i, category in enumerate(categories):
+        if not category or category == "Misc":
+            categories[i] = categorize_file(Path(names[i]))
+    
+    return categories
+
+
+def _categorize_with_mime(suffix: str, mime_type: Optional[str]) -> str:
+    """
+    Same as categorize_file, but reuses a MIME type the caller already
+    detected instead of reading the file's magic bytes again.
+    
+    Args:
+        suffix: The file's suffix (e.g., ".pdf")
+        mime_type: Detected MIME type for this file (may be None)
+        
+    Returns:
+        Category string
+    """
+    category = _categorize_by_suffix(suffix)
+    
+    if category and category != "Misc":
+        return category
+    
+    category = _category_for_mime(mime_type) if mime_type else None
+    
+    return category or "Misc"
+
+
+def _categorize_by_suffix(suffix: str) -> Optional[str]:
+    """
+    Categorize a file by its suffix, as given (any case).
+    
+    Most suffixes are already lowercase, so the raw suffix is probed first
+    and case is only folded when that misses.
+    """
+    category = _categorize_by_extension(suffix)
+    if category is None and not suffix.islower():
+        category = _categorize_by_extension(suffix.lower())
+    return category
+
+
 def _categorize_by_extension(extension: str) -> Optional[str]:
     """
     Categorize file by its extension.
@@ -42,92 +152,272 @@ def _categorize_by_extension(extension: str) -> Optional[str]:
     Returns:
         Category string or None if not found
     """
-    for category, extensions in settings.category_map.items():
-        if extension in extensions:
-            return category
-    
-    return None
+    return _EXTENSION_INDEX.get(extension)
 
 
-def _categorize_by_mime(file_path: Path) -> Optional[str]:
+def _categorize_by_mime(path_str: str) -> Optional[str]:
     """
     Categorize file by its MIME type.
     
     Args:
-        file_path: Path to the file
+        path_str: Path to the file, already converted to a string
         
     Returns:
         Category string or None if not found
     """
     try:
-        # Use filetype library to detect MIME type
-        kind = filetype.guess(str(file_path))
-        if kind is None:
+        mime_type = _guess_mime(path_str)
+        if mime_type is None:
             return None
         
-        mime_type = kind.mime
+        return _category_for_mime(mime_type)
+        
+    except OSError:
+        # File vanished or unreadable - no MIME type
+        return None
+
+
+def _guess_mime(path_str: str) -> Optional[str]:
+    """
+    Detect a file's MIME type from its magic bytes.
+    
+    The file's header is read once. Common types (PDF, JPEG, GIF, MP3) are
+    recognised from its first bytes; everything else is matched by the
+    filetype library against the same buffer.
+    
+    Args:
+        path_str: Path to the file
         
-        # Check MIME type fallbacks
-        for mime_prefix, category in settings.mime_fallbacks.items():
-            if mime_type.startswith(mime_prefix):
-                return category
+    Returns:
+        MIME type string or None if unknown
         
+    Raises:
+        OSError: If the file can't be read
+    """
+    head = _read_magic(path_str)
+    if not head:
         return None
+    
+    for signature, mime_type in _MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    
+    # Use filetype library for everything else, on the header already read
+    kind = filetype.guess(head)
+    return kind.mime if kind else None
+
+
+def _read_magic(path_str: str) -> bytes:
+    """
+    Read the start of a file for signature matching.
+    
+    Uses a raw descriptor rather than open(), which would set up a buffered
+    file object for a single read.
+    
+    Raises:
+        OSError: If the file can't be read
+    """
+    fd = os.open(path_str, _MAGIC_OPEN_FLAGS)
+    try:
+        return os.read(fd, _MAGIC_READ_SIZE)
+    finally:
+        os.close(fd)
+
+
+def _category_for_mime(mime_type: str) -> Optional[str]:
+    """
+    Map a MIME type to a category using the MIME fallbacks.
+    
+    Args:
+        mime_type: MIME type (e.g., "image/png")
         
-    except Exception:
-        # If MIME detection fails, return None
+    Returns:
+        Category string or None if no fallback matches
+    """
+    # One regex match instead of a startswith() per prefix
+    match = _MIME_PATTERN.match(mime_type)
+    if match is None or match.lastindex is None:
         return None
+    
+    return _MIME_FALLBACKS[match.lastindex - 1][1]
 
 
-def get_file_metadata(file_path: Path) -> dict:
+def get_file_metadata(file_path: Path, ocr: bool = True) -> dict:
     """
     Get comprehensive file metadata for categorization.
     
+    A missing or unreadable file (OSError) gives an entry with an "error"
+    key; other exceptions propagate to the caller. get_file_metadata_batch
+    catches those per file.
+    
     Args:
         file_path: Path to the file
+        ocr: Extract OCR text for supported files (when enabled in settings)
         
     Returns:
         Dictionary with file metadata
     """
     try:
         stat = file_path.stat()
-        kind = filetype.guess(str(file_path))
-        
-        # Basic metadata
-        metadata = {
-            "name": file_path.name,
-            "extension": file_path.suffix.lower(),
-            "size": stat.st_size,
-            "mime_type": kind.mime if kind else None,
-            "category": categorize_file(file_path),
-            "is_file": file_path.is_file(),
-            "is_dir": file_path.is_dir()
-        }
+        # File type comes from the same stat - is_file()/is_dir() would stat again
+        return _build_metadata(str(file_path), file_path.name, stat,
+                               _stat.S_ISREG(stat.st_mode), _stat.S_ISDIR(stat.st_mode), ocr)
+    except OSError as e:
+        # Missing/unreadable file (e.g. deleted mid-scan)
+        return _error_metadata(file_path.name, e)
+
+
+def get_file_metadata_from_entry(entry: os.DirEntry, ocr: bool = True) -> dict:
+    """
+    Get file metadata for a directory entry found by os.scandir.
+    
+    Same result as get_file_metadata, but reuses the stat and file-type
+    information the DirEntry already caches instead of asking the OS again.
+    
+    Args:
+        entry: Directory entry for the file
+        ocr: Extract OCR text for supported files (when enabled in settings)
         
-        # Add OCR text if supported AND enabled (OCR is slow)
-        if settings.enable_ocr_indexing and file_path.suffix.lower() in get_supported_formats():
-            ocr_text = extract_text_from_file(file_path)
-            if ocr_text:
-                metadata["ocr_text"] = ocr_text
-                metadata["has_ocr"] = True
-            else:
-                metadata["has_ocr"] = False
-        else:
-            metadata["has_ocr"] = False
+    Returns:
+        Dictionary with file metadata
+    """
+    try:
+        return _build_metadata(entry.path, entry.name, entry.stat(),
+                               entry.is_file(), entry.is_dir(), ocr)
+    except OSError as e:
+        # Missing/unreadable file (e.g. deleted mid-scan)
+        return _error_metadata(entry.name, e)
+
+
+def get_file_metadata_batch(files: Iterable[Union[Path, os.DirEntry]],
+                            max_workers: Optional[int] = None) -> List[dict]:
+    """
+    Get metadata for many files concurrently.
+    
+    Metadata extraction is I/O-bound (stat, header read, Tesseract runs as a
+    subprocess), so a thread pool overlaps the per-file waits. OCR is queued
+    as its own jobs once every file's basic metadata is in, so a few slow
+    OCR files never hold up the rest of the batch.
+    
+    Args:
+        files: Paths, or os.DirEntry objects from os.scandir
+        max_workers: Thread count (default: 4 per CPU, at most 32)
         
-        return metadata
+    Returns:
+        List of metadata dicts in the same order as files
+    """
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+    
+    files = list(files)
+    
+    def metadata_for(item):
+        # One bad file must not stop the batch - report it as an error entry
+        try:
+            if isinstance(item, os.DirEntry):
+                return get_file_metadata_from_entry(item, ocr=False)
+            return get_file_metadata(item, ocr=False)
+        except Exception as e:
+            logger.error(f"Error processing file {_item_path(item)}: {e}")
+            return _error_metadata(os.path.basename(_item_path(item)), e)
+    
+    def ocr_for(path):
+        try:
+            return extract_text_from_file(path)
+        except Exception as e:
+            logger.error(f"Error extracting OCR text from {path}: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(metadata_for, files))
         
-    except Exception as e:
-        return {
-            "name": file_path.name,
-            "extension": file_path.suffix.lower(),
-            "size": 0,
-            "mime_type": None,
-            "category": "Misc",
-            "is_file": False,
-            "is_dir": False,
-            "has_ocr": False,
-            "error": str(e)
-        }
+        # Second stage: OCR for the files that need it
+        ocr_jobs = [(metadata, Path(item)) for item, metadata in zip(files, results)
+                    if "error" not in metadata and _wants_ocr(metadata["extension"])]
+        if ocr_jobs:
+            ocr_paths = [path for _, path in ocr_jobs]
+            for (metadata, _), ocr_text in zip(ocr_jobs, executor.map(ocr_for, ocr_paths)):
+                _apply_ocr(metadata, ocr_text)
+    
+    return results
+
+
+def _item_path(item: Union[Path, os.DirEntry]) -> str:
+    """Path string of a get_file_metadata_batch item."""
+    return item.path if isinstance(item, os.DirEntry) else str(item)
+
+
+def _suffix(name: str) -> str:
+    """Same as Path(name).suffix, without building a Path per file."""
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[i:]
+    return ''
+
+
+def _wants_ocr(extension: str) -> bool:
+    """Whether files with this (lowercase) extension get OCR text."""
+    return settings.enable_ocr_indexing and extension in _OCR_SUPPORTED
+
+
+def _apply_ocr(metadata: dict, ocr_text: Optional[str]) -> None:
+    """Record OCR output on a metadata dict."""
+    if ocr_text:
+        metadata["ocr_text"] = ocr_text
+        metadata["has_ocr"] = True
+
+
+def _build_metadata(path_str: str, name: str, stat: os.stat_result,
+                    is_file: bool, is_dir: bool, ocr: bool = True) -> dict:
+    """
+    Assemble the metadata dict from already-gathered stat/type info.
+    
+    Works on the plain path and name strings; a Path is only built for
+    files that go on to OCR.
+    """
+    suffix = _suffix(name)
+    extension = suffix.lower()
+    if extension in _TRUSTED_EXTENSIONS:
+        # The extension is authoritative - skip reading the file's magic bytes
+        mime_type = mimetypes.guess_type(name)[0]
+        category = _EXTENSION_INDEX[extension]
+    else:
+        mime_type = _guess_mime(path_str)
+        category = _categorize_with_mime(suffix, mime_type)
+    
+    # Add OCR text if supported AND enabled (OCR is slow)
+    ocr_text = None
+    if ocr and _wants_ocr(extension):
+        ocr_text = extract_text_from_file(Path(path_str))
+    
+    # Built in one literal so the dict is allocated at its final size
+    # rather than grown key by key
+    metadata = {
+        "name": name,
+        "extension": extension,
+        "size": stat.st_size,
+        "mime_type": mime_type,
+        "category": category,
+        "is_file": is_file,
+        "is_dir": is_dir,
+        "has_ocr": bool(ocr_text)
+    }
+    if ocr_text:
+        metadata["ocr_text"] = ocr_text
+    
+    return metadata
 
 
+def _error_metadata(name: str, error: Exception) -> dict:
+    """Metadata returned when a file can't be read."""
+    return {
+        "name": name,
+        "extension": _suffix(name).lower(),
+        "size": 0,
+        "mime_type": None,
+        "category": "Misc",
+        "is_file": False,
+        "is_dir": False,
+        "has_ocr": False,
+        "error": str(error)
+    }
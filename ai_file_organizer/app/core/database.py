@@ -2,17 +2,286 @@
 Database management for file indexing and search functionality.
 """
 
+import atexit
 import os
 import sqlite3
 import json
+import queue
+import struct
+import sys
+import time
+from array import array
 import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime
 from .settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Use orjson for stored JSON when it's installed (optional, faster)
+try:
+    import orjson
+    from orjson import loads as _json_loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+
+def _json_dumps(value: Any) -> str:
+    """Serialize a value for a JSON text column (orjson when available)."""
+    if orjson is not None:
+        try:
+            # Decode: bytes would be stored as a BLOB, which json_each rejects
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # Out-of-range ints and other values orjson refuses
+            pass
+    return json.dumps(value)
+
+# numpy (installed with scipy) lets get_embedding_matrix return one contiguous
+# float32 matrix; without it the rows come back as array('f') lists
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Run once on every connection FileIndex opens. WAL lets the UI read while an
+# indexer writes; NORMAL sync is safe under WAL and skips per-commit fsyncs.
+# busy_timeout comes first so the WAL switch itself waits out another writer.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Embeddings live in their own file, attached to every connection as "emb",
+# so the large vector pages don't evict the hot files/FTS pages from cache.
+# SQLite can't enforce foreign keys across databases: deleting files rows
+# must also delete their embeddings explicitly.
+_EMBEDDINGS_PRAGMAS = (
+    "PRAGMA emb.journal_mode=WAL",
+    "PRAGMA emb.synchronous=NORMAL",
+    "PRAGMA emb.cache_size=-16384",
+)
+
+_UPSERT_EMBEDDING_SQL = """
+    INSERT INTO emb.embeddings(file_id, model, dim, vector, dtype, updated_at)
+    VALUES(?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_id) DO UPDATE SET
+        model=excluded.model,
+        dim=excluded.dim,
+        vector=excluded.vector,
+        dtype=excluded.dtype,
+        updated_at=excluded.updated_at
+"""
+
+_CREATE_EMBEDDINGS_SQL = """
+    CREATE TABLE IF NOT EXISTS emb.embeddings (
+        file_id INTEGER PRIMARY KEY,
+        model TEXT NOT NULL,
+        dim INTEGER NOT NULL,
+        vector BLOB NOT NULL,
+        dtype TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+"""
+
+# Hot statements kept as module constants so every call passes the identical
+# SQL text and hits the connection's statement cache instead of re-preparing.
+_STATEMENT_CACHE_SIZE = 256
+
+# AS MATERIALIZED (SQLite 3.35+) keeps a CTE from being flattened into the
+# outer query; older SQLite materializes such CTEs on its own anyway
+_CTE_MATERIALIZED = "MATERIALIZED " if sqlite3.sqlite_version_info >= (3, 35, 0) else ""
+
+# Upsert in place: keeps the row id, so embeddings (ON DELETE CASCADE) and
+# file_tags rows survive a re-index instead of being deleted with the old row
+_INSERT_FILE_SQL = """
+    INSERT INTO files (
+        file_path, file_name, file_extension, file_size,
+        mime_type, category, created_date, modified_date,
+        indexed_date, has_ocr, ocr_text,
+        label, tags, caption, vision_confidence,
+        content_hash, last_indexed_at, ai_source, user_tags,
+        metadata, original_date
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_path) DO UPDATE SET
+        file_name = excluded.file_name,
+        file_extension = excluded.file_extension,
+        file_size = excluded.file_size,
+        mime_type = excluded.mime_type,
+        category = excluded.category,
+        created_date = excluded.created_date,
+        modified_date = excluded.modified_date,
+        indexed_date = excluded.indexed_date,
+        has_ocr = excluded.has_ocr,
+        ocr_text = excluded.ocr_text,
+        label = excluded.label,
+        tags = excluded.tags,
+        caption = excluded.caption,
+        vision_confidence = excluded.vision_confidence,
+        content_hash = excluded.content_hash,
+        last_indexed_at = excluded.last_indexed_at,
+        ai_source = excluded.ai_source,
+        user_tags = excluded.user_tags,
+        metadata = excluded.metadata,
+        original_date = excluded.original_date
+"""
+
+# Keep the external-content FTS index in step with files on every write
+# (see the FTS5 docs on external content tables). The update trigger only
+# fires when an indexed column actually changes, so date resyncs and
+# re-indexing an unchanged file don't rewrite the file's tokens.
+_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER files_ai AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts(rowid, file_name, file_path, category, ocr_text, caption, tags)
+        VALUES (new.id, new.file_name, new.file_path, new.category, new.ocr_text, new.caption, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER files_ad AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts(files_fts, rowid, file_name, file_path, category, ocr_text, caption, tags)
+        VALUES ('delete', old.id, old.file_name, old.file_path, old.category, old.ocr_text, old.caption, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER files_au AFTER UPDATE OF file_name, file_path, category, ocr_text, caption, tags ON files
+    WHEN old.file_name IS NOT new.file_name OR old.file_path IS NOT new.file_path
+        OR old.category IS NOT new.category OR old.ocr_text IS NOT new.ocr_text
+        OR old.caption IS NOT new.caption OR old.tags IS NOT new.tags
+    BEGIN
+        INSERT INTO files_fts(files_fts, rowid, file_name, file_path, category, ocr_text, caption, tags)
+        VALUES ('delete', old.id, old.file_name, old.file_path, old.category, old.ocr_text, old.caption, old.tags);
+        INSERT INTO files_fts(rowid, file_name, file_path, category, ocr_text, caption, tags)
+        VALUES (new.id, new.file_name, new.file_path, new.category, new.ocr_text, new.caption, new.tags);
+    END
+    """,
+)
+_FTS_TRIGGER_NAMES = ("files_ai", "files_ad", "files_au")
+
+
+def _tag_array_sql(column: str) -> str:
+    """SQL for a tags column as a JSON array; NULL for legacy comma-separated text."""
+    return f"CASE WHEN json_valid({column}) THEN CASE WHEN json_type({column}) = 'array' THEN {column} END END"
+
+
+def _insert_file_tags_sql(kind: str, row: str = "new") -> tuple:
+    """Statements linking <row>.<kind> (tags or user_tags) into file_tags.
+
+    row is "new" inside the triggers; any other alias reads every row of
+    files under that alias (used to backfill).
+
+    Written so they never hit a constraint: inside a trigger the outer
+    statement's conflict policy wins, so an OR REPLACE write to files would
+    replace (renumber) existing tags rows.
+    """
+    tags = _tag_array_sql(f"{row}.{kind}")
+    source = f"json_each({tags}) j" if row == "new" else f"files {row}, json_each({tags}) j"
+    return (
+        f"INSERT INTO tags(name) SELECT DISTINCT trim(j.value) FROM {source} "
+        f"WHERE trim(j.value) != '' AND NOT EXISTS (SELECT 1 FROM tags t WHERE t.name = trim(j.value))",
+        f"INSERT INTO file_tags(file_id, tag_id, kind) SELECT DISTINCT {row}.id, t.id, '{kind}' "
+        f"FROM {source} JOIN tags t ON t.name = trim(j.value)",
+    )
+
+
+def _trigger_body(*statements: str) -> str:
+    """Join SQL statements into a trigger body."""
+    return "".join(f"{statement};\n" for statement in statements)
+
+
+# Normalized copy of the JSON tags/user_tags columns, so tag filters are an
+# index seek on a small table instead of a LIKE over every file's JSON text.
+# The JSON columns stay the source of truth (and feed the FTS index).
+_TAG_TRIGGERS = (
+    f"""
+    CREATE TRIGGER files_tags_ai AFTER INSERT ON files BEGIN
+        {_trigger_body(*_insert_file_tags_sql('tags'), *_insert_file_tags_sql('user_tags'))}
+    END
+    """,
+    """
+    CREATE TRIGGER files_tags_ad AFTER DELETE ON files BEGIN
+        DELETE FROM file_tags WHERE file_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER files_tags_au AFTER UPDATE OF tags, user_tags ON files
+    WHEN old.tags IS NOT new.tags OR old.user_tags IS NOT new.user_tags
+    BEGIN
+        DELETE FROM file_tags WHERE file_id = old.id;
+        {_trigger_body(*_insert_file_tags_sql('tags'), *_insert_file_tags_sql('user_tags'))}
+    END
+    """,
+)
+_TAG_TRIGGER_NAMES = ("files_tags_ai", "files_tags_ad", "files_tags_au")
+
+# Tag filter for search: files with a tag containing the term, plus legacy
+# rows whose tags aren't a JSON array (not mirrored into file_tags)
+_TAG_FILTER_SQL = (
+    " AND (f.id IN (SELECT ft.file_id FROM file_tags ft JOIN tags t ON t.id = ft.tag_id"
+    " WHERE ft.kind = 'tags' AND t.name LIKE ?)"
+    f" OR ({_tag_array_sql('f.tags')} IS NULL AND f.tags LIKE ?))"
+)
+
+# Bump when _init_database gains new tables, columns, indexes or triggers;
+# databases stamped with this version (PRAGMA user_version) skip the checks.
+SCHEMA_VERSION = 8
+# Schema version from which files_fts has had its current layout and triggers
+_FTS_SCHEMA_VERSION = 5
+
+# Embedding vectors are stored as packed little-endian floats; dtype names the
+# struct format. New vectors are f32, which decodes with a single copy into an
+# array('f'); f16 rows written by earlier versions are still read.
+_VECTOR_FORMATS = {'f16': 'e', 'f32': 'f'}
+
+# Paths per IN (...) lookup when preserving stored fields in bulk adds
+_PRESERVE_LOOKUP_CHUNK = 500
+
+# Seconds the background writer gathers search_history rows before one insert
+_SEARCH_LOG_FLUSH_INTERVAL = 0.25
+
+_INSERT_SEARCH_LOG_SQL = "INSERT INTO search_history (query, timestamp, results_count) VALUES (?, ?, ?)"
+
+# Secondary indexes on files: (index name, columns, partial-index WHERE or None)
+# Rows with non-empty tags; get_filenames_with_tags repeats this predicate
+# verbatim so the planner can use the partial index below
+_HAS_TAGS_SQL = "tags IS NOT NULL AND tags != '' AND tags != '[]'"
+
+_FILE_INDEXES = (
+    # Also serves plain category filters, and "recent in category" without a sort
+    ("ix_files_category_modified", "category, modified_date DESC", None),
+    ("ix_files_ext", "file_extension", None),
+    ("ix_files_modified", "modified_date", None),
+    ("ix_files_hash", "content_hash", None),
+    # Partial indexes only hold the matching rows, so they stay small
+    ("ix_files_has_ocr", "id", "has_ocr = 1"),
+    ("ix_files_no_label", "id", "label IS NULL"),
+    # Covers get_filenames_with_tags: an index-only scan of tagged rows
+    # (tags is included so the predicate is checked without a table lookup)
+    ("ix_files_tagged_name", "file_name, tags", _HAS_TAGS_SQL),
+)
+# Indexes made redundant by one above
+_DROPPED_FILE_INDEXES = ("ix_files_category",)
+
+# One fixed UPDATE per user-editable field; rewriting an unchanged value is
+# skipped, so it doesn't fire the FTS/tag triggers either
+_UPDATE_FIELD_SQL = {
+    field: f"UPDATE files SET {field} = ? WHERE id = ? AND {field} IS NOT ?"
+    for field in ("label", "caption", "tags", "user_tags", "metadata")
+}
+# Editable fields stored as JSON text
+_JSON_UPDATE_FIELDS = frozenset(("tags", "user_tags", "metadata"))
+
 def _parse_tags_value(raw: Any) -> Optional[List[str]]:
     """Parse tags stored in DB.
 
@@ -28,19 +297,197 @@ def _parse_tags_value(raw: Any) -> Optional[List[str]]:
     s = raw.strip()
     if not s:
         return None
-    # Try JSON list first
-    try:
-        v = json.loads(s)
-        if isinstance(v, list):
-            return [str(t).strip() for t in v if str(t).strip()]
-        if isinstance(v, str) and v.strip():
-            # Sometimes legacy stored a JSON string
-            return [t.strip() for t in v.split(",") if t.strip()]
-    except Exception:
-        pass
+    # JSON list (current format) or JSON string (legacy); anything else can
+    # only be comma-separated text, so skip the JSON attempt for it
+    if s[0] in '["':
+        try:
+            v = _json_loads(s)
+            if isinstance(v, list):
+                return [str(t).strip() for t in v if str(t).strip()]
+            if isinstance(v, str) and v.strip():
+                # Sometimes legacy stored a JSON string
+                return [t.strip() for t in v.split(",") if t.strip()]
+        except Exception:
+            pass
     # Fallback: comma-separated string
     return [t.strip() for t in s.split(",") if t.strip()]
 
+
+def _missing_in_dir(dir_path: str, rows: List[tuple]) -> List[int]:
+    """Return the ids of (id, path) rows in dir_path whose files no longer exist.
+
+    Lists the folder once instead of stat-ing every file. A miss falls back to
+    a real lookup, which also resolves symlinks and names that differ only in
+    case/normalization (macOS).
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            names = {entry.name for entry in it if not entry.is_symlink()}
+    except OSError:
+        names = set()
+    return [
+        file_id for file_id, file_path in rows
+        if os.path.basename(file_path) not in names and not os.path.exists(file_path)
+    ]
+
+
+def _read_file_dates(file_path: str, get_original_date=None) -> tuple:
+    """Read a file's dates for resync_file_dates (runs on worker threads).
+
+    Returns:
+        ('updated', (created, modified, original)), ('not_found', None)
+        or ('errors', None)
+    """
+    try:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            logger.debug(f"File not found: {file_path}")
+            return 'not_found', None
+        created_date = datetime.fromtimestamp(stat.st_ctime).isoformat()
+        modified_date = datetime.fromtimestamp(stat.st_mtime).isoformat()
+        
+        # Try to extract original date from file metadata
+        original_date = None
+        if get_original_date:
+            try:
+                orig_dt = get_original_date(file_path)
+                if orig_dt:
+                    original_date = orig_dt.isoformat()
+                    logger.debug(f"Metadata date for {os.path.basename(file_path)}: {original_date}")
+            except Exception as e:
+                logger.debug(f"Metadata extraction failed for {file_path}: {e}")
+        return 'updated', (created_date, modified_date, original_date)
+    except Exception as e:
+        logger.warning(f"Error updating dates for {file_path}: {e}")
+        return 'errors', None
+
+
+def _pack_vector(vector: List[float]) -> tuple:
+    """Pack an embedding as little-endian float32 bytes.
+
+    Returns:
+        (blob, dtype) for the embeddings table
+    """
+    values = array('f', vector)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes(), 'f32'
+
+
+def _unpack_vector(blob: bytes, dtype: str) -> array:
+    """Decode a vector stored by _pack_vector (or an older f16 one) into array('f')."""
+    if not blob:
+        return array('f')
+    if dtype == 'f32':
+        values = array('f')
+        values.frombytes(blob)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+    code = _VECTOR_FORMATS[dtype]
+    return array('f', struct.unpack(f"<{len(blob) // struct.calcsize(code)}{code}", blob))
+
+
+# Columns returned by the single-file getters and advanced search, in the
+# order they're selected (every one exists after the schema migration)
+_FILE_COLUMNS = (
+    'id', 'file_path', 'file_name', 'file_extension', 'file_size', 'mime_type',
+    'category', 'created_date', 'modified_date', 'indexed_date', 'original_date',
+    'has_ocr', 'ocr_text', 'label', 'tags', 'caption', 'vision_confidence',
+    'content_hash', 'ai_source', 'metadata',
+)
+_FILE_COLUMNS_SQL = ", ".join(_FILE_COLUMNS)
+_FILE_COLUMNS_SQL_F = ", ".join(f"f.{column}" for column in _FILE_COLUMNS)
+
+# Files for a JSON array of ids, bound as one parameter
+_FILES_BY_JSON_IDS_SQL = (
+    f"SELECT {_FILE_COLUMNS_SQL} FROM files WHERE id IN (SELECT value FROM json_each(?))"
+)
+
+
+def _is_corruption_error(error: Exception) -> bool:
+    """Whether a SQLite error means the database (in practice files_fts) is damaged."""
+    error_str = str(error).lower()
+    return "malformed" in error_str or "corrupt" in error_str
+
+
+def _padded_in_params(values: List[Any]) -> tuple:
+    """Placeholders and parameters for an IN (...) list, padded to a power of two.
+
+    Repeating the last value doesn't change the result, and keeps the number
+    of distinct SQL strings small so they stay in the statement cache.
+
+    Returns:
+        (placeholders, params)
+    """
+    size = 1 << (len(values) - 1).bit_length()
+    params = list(values) + [values[-1]] * (size - len(values))
+    return ",".join("?" * size), params
+
+
+def _row_to_dict(row: tuple, _keys=_FILE_COLUMNS, _dict=dict, _zip=zip, _bool=bool,
+                 _parse_tags=_parse_tags_value, _loads=_json_loads) -> Dict[str, Any]:
+    """Build a file dict from a plain row selected as _FILE_COLUMNS.
+
+    Called once per result row; the defaults bind globals/builtins as locals.
+    """
+    file_dict = _dict(_zip(_keys, row))
+    file_dict['has_ocr'] = _bool(file_dict['has_ocr'])
+    file_dict['tags'] = _parse_tags(file_dict['tags'])
+    metadata = file_dict['metadata']
+    file_dict['metadata'] = _loads(metadata) if metadata else {}
+    return file_dict
+
+
+class _LazyRow(Mapping):
+    """Read-only search result backed by a sqlite3.Row.
+
+    Exposes the same keys as the dicts search_files used to build, but only
+    decodes tags/metadata JSON when they are read. copy() returns a plain dict.
+    """
+
+    _KEYS = (
+        'id', 'file_path', 'file_name', 'file_extension', 'file_size', 'mime_type',
+        'category', 'created_date', 'modified_date', 'indexed_date', 'original_date',
+        'has_ocr', 'ocr_text', 'label', 'tags', 'caption', 'vision_confidence',
+        'metadata', 'rank',
+    )
+    _DECODERS = {
+        'has_ocr': bool,
+        'tags': _parse_tags_value,
+        'metadata': lambda raw: _json_loads(raw) if raw else {},
+    }
+
+    __slots__ = ('_row', '_columns', '_decoded')
+
+    def __init__(self, row: sqlite3.Row, columns: frozenset):
+        self._row = row
+        self._columns = columns
+        self._decoded: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        if key not in self._KEYS:
+            raise KeyError(key)
+        raw = self._row[key] if key in self._columns else None
+        decoder = self._DECODERS.get(key)
+        if decoder is None:
+            return raw
+        value = self._decoded[key] = decoder(raw)
+        return value
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+
 class FileIndex:
     """SQLite database for file indexing and search."""
     
@@ -50,14 +497,93 @@ class FileIndex:
             db_path = settings.get_app_data_dir() / "file_index.db"
         
         self.db_path = db_path
+        self.embeddings_path = db_path.with_suffix(".embeddings.db")
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # One long-lived connection per thread (indexing runs on worker threads)
+        self._local = threading.local()
+        # Search history is written off the search path by a daemon thread
+        self._search_log: queue.Queue = queue.Queue()
+        self._search_log_thread: Optional[threading.Thread] = None
+        self._search_log_lock = threading.Lock()
         self._init_database()
+        # Searches skip the FTS query while the index is known to be broken
+        self._fts_rebuild_lock = threading.Lock()
+        self._fts_ok = self._probe_fts()
+        if not self._fts_ok:
+            self._schedule_fts_rebuild()
+        atexit.register(self.close)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=_STATEMENT_CACHE_SIZE)
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            conn.execute("ATTACH DATABASE ? AS emb", (str(self.embeddings_path),))
+            for pragma in _EMBEDDINGS_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        # Callers opt in to sqlite3.Row per call, as with a fresh connection
+        conn.row_factory = None
+        return conn
+    
+    @contextmanager
+    def _connect(self):
+        """Use this thread's connection in a transaction.
+
+        Same behaviour as ``with sqlite3.connect(db_path) as conn`` (commit on
+        success, roll back on error) without reopening the database each call.
+        """
+        conn = self._connection()
+        with conn:
+            yield conn
+    
+    def close(self):
+        """Optimize and close this thread's connection.
+
+        PRAGMA optimize refreshes planner statistics that drift after many
+        writes. The connection is reopened if the index is used again.
+        """
+        self.flush_search_log()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        try:
+            conn.execute("PRAGMA optimize")
+        except Exception as e:
+            logger.debug(f"PRAGMA optimize failed: {e}")
+        finally:
+            conn.close()
+    
+    def maintenance(self):
+        """Refresh planner statistics and truncate the WAL file.
+
+        Meant for long-running sessions; safe to call from a background thread.
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute("ANALYZE")
+            self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            logger.warning(f"Database maintenance failed: {e}")
     
     def _init_database(self):
         """Initialize database tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
+            # Schema already up to date: skip the table/column/trigger probes
+            cursor.execute("PRAGMA user_version")
+            schema_version = cursor.fetchone()[0]
+            if schema_version == SCHEMA_VERSION:
+                # Recreates the embeddings file if it was removed
+                cursor.execute(_CREATE_EMBEDDINGS_SQL)
+                self._tag_index = self._json_functions_available(cursor)
+                logger.info(f"Database initialized at {self.db_path}")
+                return
+            
             # Create files table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS files (
@@ -114,40 +640,39 @@ class FileIndex:
             except Exception as e:
                 logger.warning(f"Schema migration warning: {e}")
             
-            # Create full-text search index
-            # Recreate FTS with latest schema (drop if exists)
-            try:
-                cursor.execute("DROP TABLE IF EXISTS files_fts")
-            except Exception:
-                pass
-            cursor.execute(
-                """
-                CREATE VIRTUAL TABLE files_fts USING fts5(
-                    file_name,
-                    file_path,
-                    category,
-                    ocr_text,
-                    caption,
-                    tags,
-                    content='files',
-                    content_rowid='id'
+            # Secondary indexes for hash lookups and search filters
+            # (file_path itself is already indexed by its UNIQUE constraint)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'files'")
+            existing_indexes = {row[0] for row in cursor.fetchall()}
+            missing = [index for index in _FILE_INDEXES if index[0] not in existing_indexes]
+            for name, columns, where in missing:
+                partial = f" WHERE {where}" if where else ""
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON files({columns}){partial}")
+            for name in _DROPPED_FILE_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            if missing:
+                # Give the planner statistics for the new indexes
+                cursor.execute("ANALYZE")
+            
+            # Create full-text search index, synced from files by triggers.
+            # Only databases from before the current FTS layout can need it
+            # (re)built: new ones, or older ones without the sync triggers.
+            if schema_version < _FTS_SCHEMA_VERSION:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+                    _FTS_TRIGGER_NAMES,
                 )
-                """
-            )
+                if cursor.fetchone()[0] < len(_FTS_TRIGGER_NAMES):
+                    self._recreate_fts(cursor)
+                else:
+                    # Index is intact; just pick up the current trigger definitions
+                    self._install_triggers(cursor, _FTS_TRIGGER_NAMES, _FTS_TRIGGERS)
 
             # Embeddings table for semantic search
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS embeddings (
-                    file_id INTEGER PRIMARY KEY,
-                    model TEXT NOT NULL,
-                    dim INTEGER NOT NULL,
-                    vector TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    FOREIGN KEY(file_id) REFERENCES files(id) ON DELETE CASCADE
-                )
-                """
-            )
+            self._init_embeddings_table(cursor)
+            
+            # Normalized tags (needs SQLite's JSON functions to stay in sync)
+            self._tag_index = self._init_tag_tables(cursor)
             
             # Create search history table
             cursor.execute("""
@@ -159,39 +684,151 @@ class FileIndex:
                 )
             """)
             
+            # Only stamp a complete schema, so a SQLite build that gains JSON
+            # support later still gets the tag tables
+            if self._tag_index:
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            
             conn.commit()
             logger.info(f"Database initialized at {self.db_path}")
 
+    @staticmethod
+    def _install_triggers(cursor: sqlite3.Cursor, names: tuple, statements: tuple):
+        """Replace the named triggers with the given CREATE TRIGGER statements."""
+        for name in names:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for trigger_sql in statements:
+            cursor.execute(trigger_sql)
+    
+    def _recreate_fts(self, cursor: sqlite3.Cursor):
+        """Drop and recreate files_fts with its sync triggers, then fill it from files.
+
+        Shared by schema setup, corruption recovery and the manual rebuild.
+        """
+        try:
+            cursor.execute("DROP TABLE IF EXISTS files_fts")
+        except Exception as e:
+            logger.warning(f"Error dropping FTS table: {e}")
+        cursor.execute(
+            """
+            CREATE VIRTUAL TABLE files_fts USING fts5(
+                file_name,
+                file_path,
+                category,
+                ocr_text,
+                caption,
+                tags,
+                content='files',
+                content_rowid='id'
+            )
+            """
+        )
+        self._install_triggers(cursor, _FTS_TRIGGER_NAMES, _FTS_TRIGGERS)
+        # Repopulate from the content table in a single pass
+        cursor.execute("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
+    
+    def _init_embeddings_table(self, cursor: sqlite3.Cursor):
+        """Create emb.embeddings, moving vectors over from the main database.
+
+        Older databases kept the table in the main file, some with JSON text
+        vectors; those are packed on the way.
+        """
+        cursor.execute(_CREATE_EMBEDDINGS_SQL)
+        cursor.execute("PRAGMA main.table_info(embeddings)")
+        cols = {row[1] for row in cursor.fetchall()}
+        if not cols:
+            return
+        
+        if 'dtype' in cols:
+            cursor.execute(
+                "INSERT OR IGNORE INTO emb.embeddings(file_id, model, dim, vector, dtype, updated_at) "
+                "SELECT file_id, model, dim, vector, dtype, updated_at FROM main.embeddings"
+            )
+            moved = cursor.rowcount
+        else:
+            cursor.execute("SELECT file_id, model, vector, updated_at FROM main.embeddings")
+            moved = 0
+            for file_id, model, vector_json, updated_at in cursor.fetchall():
+                try:
+                    vector = _json_loads(vector_json) if vector_json else []
+                    blob, dtype = _pack_vector(vector)
+                except Exception as e:
+                    logger.debug(f"Dropping unreadable embedding for {file_id}: {e}")
+                    continue
+                cursor.execute(
+                    "INSERT OR IGNORE INTO emb.embeddings(file_id, model, dim, vector, dtype, updated_at) "
+                    "VALUES(?, ?, ?, ?, ?, ?)",
+                    (file_id, model, len(vector), blob, dtype, updated_at),
+                )
+                moved += 1
+        cursor.execute("DROP TABLE main.embeddings")
+        logger.info(f"Moved {moved} embeddings to {self.embeddings_path}")
+    
+    @staticmethod
+    def _json_functions_available(cursor: sqlite3.Cursor) -> bool:
+        """Return whether this SQLite build has the JSON functions."""
+        try:
+            cursor.execute("SELECT json_valid('[]')")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def _init_tag_tables(self, cursor: sqlite3.Cursor) -> bool:
+        """Create the tags/file_tags tables and their sync triggers.
+
+        Returns False (tag filters fall back to LIKE on the JSON column) when
+        this SQLite build has no JSON functions.
+        """
+        if not self._json_functions_available(cursor):
+            logger.info("SQLite JSON functions unavailable; tag filters use LIKE")
+            return False
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS file_tags (
+                file_id INTEGER NOT NULL,
+                tag_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                PRIMARY KEY (file_id, kind, tag_id),
+                FOREIGN KEY(file_id) REFERENCES files(id) ON DELETE CASCADE,
+                FOREIGN KEY(tag_id) REFERENCES tags(id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_file_tags_tag ON file_tags(tag_id, file_id)")
+        
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+            _TAG_TRIGGER_NAMES,
+        )
+        needs_backfill = cursor.fetchone()[0] < len(_TAG_TRIGGER_NAMES)
+        self._install_triggers(cursor, _TAG_TRIGGER_NAMES, _TAG_TRIGGERS)
+        if needs_backfill:
+            cursor.execute("DELETE FROM file_tags")
+            for kind in ("tags", "user_tags"):
+                for statement in _insert_file_tags_sql(kind, row="f"):
+                    cursor.execute(statement)
+        return True
+
     # --- Update helpers for user edits ---
     def update_file_field(self, file_id: int, field: str, value: Any) -> bool:
         """Update a single editable field for a file. Returns True on success.
         Allowed fields: label, caption, tags, user_tags, metadata.
         """
-        # DIAGNOSTIC: Log every database write
-        import traceback
-        stack_summary = ''.join(traceback.format_stack()[-5:-1])
-        logger.warning(f"[DB_WRITE] update_file_field called: file_id={file_id}, field='{field}', value={repr(value)[:100]}")
-        logger.warning(f"[DB_WRITE] Call stack:\n{stack_summary}")
+        logger.debug("update_file_field: id=%s field=%s", file_id, field)
         
-        allowed = {"label", "caption", "tags", "user_tags", "metadata"}
-        if field not in allowed:
+        sql = _UPDATE_FIELD_SQL.get(field)
+        if sql is None:
             return False
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                val = value
-                if field in {"tags", "user_tags", "metadata"}:
-                    # store as JSON text
-                    import json as _json
-                    val = _json.dumps(value)
-                cursor.execute(f"UPDATE files SET {field} = ? WHERE id = ?", (val, file_id))
-                # update FTS mirror for edited fields
-                if field in {"caption", "tags", "label"}:
-                    cursor.execute(
-                        "INSERT OR REPLACE INTO files_fts (rowid, file_name, file_path, category, ocr_text, caption, tags) "
-                        "SELECT id, file_name, file_path, category, ocr_text, caption, tags FROM files WHERE id = ?",
-                        (file_id,)
-                    )
+                val = _json_dumps(value) if field in _JSON_UPDATE_FIELDS else value
+                cursor.execute(sql, (val, file_id, val))
                 conn.commit()
                 return True
         except Exception as e:
@@ -211,58 +848,45 @@ class FileIndex:
             True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # IMPORTANT: Before updating, remove any stale entry that has the same path
                 # This prevents UNIQUE constraint errors when a file is moved to a path
                 # that was previously occupied by another file (now moved/deleted)
-                cursor.execute(
-                    "DELETE FROM files WHERE file_path = ? AND id != ?",
-                    (new_path, file_id)
-                )
-                stale_deleted = cursor.rowcount
-                if stale_deleted > 0:
-                    logger.info(f"Removed {stale_deleted} stale entry/entries for path: {new_path}")
-                    # Also clean up FTS entries for deleted records
+                # (the FTS index follows both writes via triggers)
+                def move_entry():
                     cursor.execute(
-                        "DELETE FROM files_fts WHERE rowid NOT IN (SELECT id FROM files)"
+                        "DELETE FROM emb.embeddings WHERE file_id IN "
+                        "(SELECT id FROM files WHERE file_path = ? AND id != ?)",
+                        (new_path, file_id)
                     )
-                
-                # Update file_path in main table
-                cursor.execute(
-                    "UPDATE files SET file_path = ? WHERE id = ?",
-                    (new_path, file_id)
-                )
-                rows_updated = cursor.rowcount
-                
-                # For external content FTS5 tables, we CANNOT use UPDATE directly.
-                # We must DELETE the old entry and INSERT a new one from the main table.
-                try:
-                    # Delete old FTS entry
                     cursor.execute(
-                        "DELETE FROM files_fts WHERE rowid = ?",
-                        (file_id,)
+                        "DELETE FROM files WHERE file_path = ? AND id != ?",
+                        (new_path, file_id)
                     )
+                    stale_deleted = cursor.rowcount
+                    if stale_deleted > 0:
+                        logger.info(f"Removed {stale_deleted} stale entry/entries for path: {new_path}")
                     
-                    # Re-insert updated content from main table
+                    # Update file_path in main table
                     cursor.execute(
-                        """
-                        INSERT INTO files_fts(rowid, file_name, file_path, category, ocr_text, caption, tags)
-                        SELECT id, file_name, file_path, category, ocr_text, caption, tags 
-                        FROM files WHERE id = ?
-                        """,
-                        (file_id,)
+                        "UPDATE files SET file_path = ? WHERE id = ?",
+                        (new_path, file_id)
                     )
-                except Exception as fts_err:
-                    error_str = str(fts_err).lower()
-                    # Auto-heal if FTS index is corrupted
-                    if "malformed" in error_str or "corrupt" in error_str:
+                    return cursor.rowcount
+                
+                try:
+                    rows_updated = move_entry()
+                except sqlite3.DatabaseError as fts_err:
+                    # Auto-heal if FTS index is corrupted, then retry once
+                    if _is_corruption_error(fts_err):
                         logger.warning(f"FTS index corrupted, triggering auto-rebuild...")
-                        conn.commit()  # Commit main table changes first
+                        conn.rollback()
                         self._auto_rebuild_fts()
+                        rows_updated = move_entry()
                     else:
-                        logger.warning(f"FTS index update failed for {file_id}: {fts_err}")
+                        raise
                 
                 conn.commit()
                 
@@ -290,7 +914,7 @@ class FileIndex:
             True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Find the file by its current path
@@ -321,18 +945,15 @@ class FileIndex:
             True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Delete from main table
                 cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
                 deleted = cursor.rowcount
                 
-                # Delete from FTS table
-                cursor.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
-                
                 # Delete from embeddings if exists
-                cursor.execute("DELETE FROM embeddings WHERE file_id = ?", (file_id,))
+                cursor.execute("DELETE FROM emb.embeddings WHERE file_id = ?", (file_id,))
                 
                 conn.commit()
                 
@@ -356,7 +977,7 @@ class FileIndex:
             True if successful, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Get the file ID first
@@ -369,8 +990,7 @@ class FileIndex:
                 
                 # Delete from all tables
                 cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
-                cursor.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
-                cursor.execute("DELETE FROM embeddings WHERE file_id = ?", (file_id,))
+                cursor.execute("DELETE FROM emb.embeddings WHERE file_id = ?", (file_id,))
                 
                 conn.commit()
                 logger.info(f"Deleted file entry for path: {file_path}")
@@ -394,7 +1014,7 @@ class FileIndex:
         stats = {'checked': 0, 'removed': 0, 'errors': 0}
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Get all file paths and IDs
@@ -404,21 +1024,33 @@ class FileIndex:
                 
                 stale_ids = []
                 
-                for i, (file_id, file_path) in enumerate(all_files):
-                    if progress_callback and i % 100 == 0:
-                        progress_callback(i, len(all_files))
-                    
-                    # Check if file exists
-                    if not Path(file_path).exists():
-                        stale_ids.append(file_id)
+                # List each parent folder once instead of stat-ing every file
+                by_dir: Dict[str, List[tuple]] = {}
+                for file_id, file_path in all_files:
+                    by_dir.setdefault(os.path.dirname(file_path), []).append((file_id, file_path))
+                
+                # Folder listings are I/O bound (the GIL is released), so
+                # check folders concurrently
+                checked = 0
+                max_workers = min(32, (os.cpu_count() or 1) * 4)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(_missing_in_dir, dir_path, rows): len(rows)
+                        for dir_path, rows in by_dir.items()
+                    }
+                    for future in as_completed(futures):
+                        stale_ids.extend(future.result())
+                        previous = checked
+                        checked += futures[future]
+                        if progress_callback and checked // 100 != previous // 100:
+                            progress_callback(checked, len(all_files))
                 
                 # Batch delete stale entries
                 if stale_ids:
                     placeholders = ','.join('?' * len(stale_ids))
                     
                     cursor.execute(f"DELETE FROM files WHERE id IN ({placeholders})", stale_ids)
-                    cursor.execute(f"DELETE FROM files_fts WHERE rowid IN ({placeholders})", stale_ids)
-                    cursor.execute(f"DELETE FROM embeddings WHERE file_id IN ({placeholders})", stale_ids)
+                    cursor.execute(f"DELETE FROM emb.embeddings WHERE file_id IN ({placeholders})", stale_ids)
                     
                     stats['removed'] = len(stale_ids)
                     conn.commit()
@@ -443,165 +1075,204 @@ class FileIndex:
         Returns:
             True if successful, False otherwise
         """
-        # DIAGNOSTIC: Log add_file calls with tags info
-        file_name = file_data.get('name', 'unknown')
-        incoming_tags = file_data.get('tags')
-        logger.warning(f"[DB_WRITE] add_file called: file='{file_name}', incoming_tags={repr(incoming_tags)[:100]}")
+        logger.debug("add_file: file=%s", file_data.get('name', 'unknown'))
+        
+        return self.add_files_bulk([file_data]) == 1
+    
+    def add_files_bulk(self, file_datas: List[Dict[str, Any]]) -> int:
+        """
+        Add or update many files in one transaction.
+        
+        Same per-file behaviour as add_file, but the whole batch shares one
+        commit and each statement is executed once over all rows.
+        
+        Args:
+            file_datas: List of file metadata dictionaries
+            
+        Returns:
+            Number of files indexed (0 if the batch failed)
+        """
+        if not file_datas:
+            return 0
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                # Prepare data
-                file_path = file_data.get('source_path', '')
-                file_name = file_data.get('name', '')
-                file_extension = file_data.get('extension', '')
-                file_size = file_data.get('size', 0)
-                mime_type = file_data.get('mime_type', '')
-                category = file_data.get('category', 'Misc')
-                has_ocr = file_data.get('has_ocr', False)
-                ocr_text = file_data.get('ocr_text', '')
-
-                # Preserve existing AI/user-enriched fields if this update doesn't provide them.
-                # This prevents accidental wiping when a "refresh/reindex" path only recomputes basic metadata.
-                try:
-                    cursor.execute(
-                        "SELECT label, tags, caption, ocr_text, has_ocr, ai_source, vision_confidence, metadata, user_tags "
-                        "FROM files WHERE file_path = ?",
-                        (file_path,),
-                    )
-                    existing = cursor.fetchone()
-                except Exception:
-                    existing = None
-
-                # label/caption: preserve if incoming empty
-                if existing is not None:
-                    if not (file_data.get('label') or '').strip():
-                        file_data['label'] = existing['label'] if 'label' in existing.keys() else file_data.get('label')
-                    if not (file_data.get('caption') or '').strip():
-                        file_data['caption'] = existing['caption'] if 'caption' in existing.keys() else file_data.get('caption')
-
-                    # tags: preserve if incoming missing/empty
-                    incoming_tags = file_data.get('tags')
-                    incoming_list = incoming_tags if isinstance(incoming_tags, list) else _parse_tags_value(incoming_tags)
-                    if not incoming_list:
-                        prev_list = _parse_tags_value(existing['tags']) if 'tags' in existing.keys() else None
-                        if prev_list:
-                            file_data['tags'] = prev_list
-
-                    # ocr_text: preserve if incoming empty but existing has OCR text
-                    if (not (ocr_text or '').strip()) and ('ocr_text' in existing.keys()) and (existing['ocr_text'] or '').strip():
-                        ocr_text = existing['ocr_text']
-                        has_ocr = bool(existing['has_ocr']) if 'has_ocr' in existing.keys() else has_ocr
-                        file_data['ocr_text'] = ocr_text
-                        file_data['has_ocr'] = has_ocr
-
-                    # ai_source / vision_confidence: preserve if incoming missing
-                    if file_data.get('ai_source') is None and 'ai_source' in existing.keys():
-                        file_data['ai_source'] = existing['ai_source']
-                    if file_data.get('vision_confidence') is None and 'vision_confidence' in existing.keys():
-                        file_data['vision_confidence'] = existing['vision_confidence']
-                
-                # Get file dates
-                try:
-                    file_path_obj = Path(file_path)
-                    if file_path_obj.exists():
-                        stat = file_path_obj.stat()
-                        created_date = datetime.fromtimestamp(stat.st_ctime).isoformat()
-                        modified_date = datetime.fromtimestamp(stat.st_mtime).isoformat()
-                    else:
-                        created_date = modified_date = datetime.now().isoformat()
-                except:
-                    created_date = modified_date = datetime.now().isoformat()
-                
-                # Try to get original date from file metadata (EXIF, Office docs, PDFs, etc.)
-                original_date = None
-                try:
-                    from app.core.metadata_utils import get_file_original_date
-                    orig_dt = get_file_original_date(file_path)
-                    if orig_dt:
-                        original_date = orig_dt.isoformat()
-                        logger.debug(f"Original date for {file_name}: {original_date}")
-                except Exception as e:
-                    logger.debug(f"Could not get original date for {file_name}: {e}")
-                
+                # Fetch stored AI/user fields for the whole batch up front
+                existing_rows = self._fetch_existing_rows(
+                    cursor, [file_data.get('source_path', '') for file_data in file_datas]
+                )
+                # One timestamp for the whole batch
                 indexed_date = datetime.now().isoformat()
+                file_rows = [
+                    self._prepare_file_row(file_data, existing_rows.get(file_data.get('source_path', '')), indexed_date)
+                    for file_data in file_datas
+                ]
                 
-                # Store additional metadata as JSON
-                metadata = {
-                    'is_file': file_data.get('is_file', False),
-                    'is_dir': file_data.get('is_dir', False),
-                    'error': file_data.get('error', None),
-                    # Persist extra AI details (not in main schema) for UI debug
-                    'ai_type': file_data.get('type', None) or file_data.get('label', None),
-                    'purpose': file_data.get('purpose', None),
-                    'suggested_filename': file_data.get('suggested_filename', None),
-                    'detected_text': file_data.get('detected_text', None),
-                    'description': file_data.get('description', None),
-                }
-
-                # Merge existing metadata if present and new values are None
-                if existing is not None and 'metadata' in existing.keys() and existing['metadata']:
-                    try:
-                        prev_meta = json.loads(existing['metadata']) if isinstance(existing['metadata'], str) else {}
-                        if isinstance(prev_meta, dict):
-                            for k, v in prev_meta.items():
-                                if metadata.get(k) is None and v is not None:
-                                    metadata[k] = v
-                    except Exception:
-                        pass
-                
-                # Insert or update file
-                cursor.execute("""
-                    INSERT OR REPLACE INTO files (
-                        file_path, file_name, file_extension, file_size,
-                        mime_type, category, created_date, modified_date,
-                        indexed_date, has_ocr, ocr_text,
-                        label, tags, caption, vision_confidence,
-                        content_hash, last_indexed_at, ai_source, user_tags,
-                        metadata, original_date
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    file_path, file_name, file_extension, file_size,
-                    mime_type, category, created_date, modified_date,
-                    indexed_date, has_ocr, ocr_text,
-                    file_data.get('label', None),
-                    json.dumps(file_data.get('tags', [])) if isinstance(file_data.get('tags'), list) else (file_data.get('tags') if isinstance(file_data.get('tags'), str) else None),
-                    file_data.get('caption', None),
-                    float(file_data.get('vision_confidence', 0)) if file_data.get('vision_confidence') is not None else None,
-                    file_data.get('content_hash', None),
-                    file_data.get('last_indexed_at', None),
-                    file_data.get('ai_source', None),
-                    json.dumps(file_data.get('user_tags', [])) if isinstance(file_data.get('user_tags'), list) else (file_data.get('user_tags') if isinstance(file_data.get('user_tags'), str) else None),
-                    json.dumps(metadata),
-                    original_date
-                ))
-                
-                # Get the rowid for FTS update
-                rowid = cursor.lastrowid
-                if rowid == 0:  # If it was an UPDATE, get the existing rowid
-                    cursor.execute("SELECT id FROM files WHERE file_path = ?", (file_path,))
-                    rowid = cursor.fetchone()[0]
-                
-                # Update FTS index
-                cursor.execute("""
-                    INSERT OR REPLACE INTO files_fts (
-                        rowid, file_name, file_path, category, ocr_text, caption, tags
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    rowid, file_name, file_path, category, ocr_text,
-                    file_data.get('caption', None),
-                    (", ".join(file_data.get('tags')) if isinstance(file_data.get('tags'), list) else file_data.get('tags'))
-                ))
+                # Insert or update files (the FTS index follows via triggers)
+                cursor.executemany(_INSERT_FILE_SQL, file_rows)
                 
                 conn.commit()
-                logger.debug(f"Indexed file: {file_path}")
-                return True
+                logger.debug(f"Indexed {len(file_rows)} file(s)")
+                return len(file_rows)
                 
         except Exception as e:
-            logger.error(f"Error indexing file {file_data.get('name', 'unknown')}: {e}")
-            return False
+            if len(file_datas) == 1:
+                logger.error(f"Error indexing file {file_datas[0].get('name', 'unknown')}: {e}")
+            else:
+                logger.error(f"Error indexing {len(file_datas)} files: {e}")
+            return 0
+    
+    def _fetch_existing_rows(self, cursor: sqlite3.Cursor, paths: List[str]) -> Dict[str, sqlite3.Row]:
+        """
+        Look up the stored fields add_file preserves, for many paths at once.
+        
+        Queries in chunks (IN lists stay under SQLite's variable limit).
+        cursor must use sqlite3.Row.
+        
+        Returns:
+            Dict of file_path -> row, for paths already in the index
+        """
+        existing: Dict[str, sqlite3.Row] = {}
+        unique_paths = list(dict.fromkeys(paths))
+        try:
+            for start in range(0, len(unique_paths), _PRESERVE_LOOKUP_CHUNK):
+                chunk = unique_paths[start:start + _PRESERVE_LOOKUP_CHUNK]
+                placeholders, params = _padded_in_params(chunk)
+                cursor.execute(
+                    "SELECT file_path, label, tags, caption, ocr_text, has_ocr, ai_source, vision_confidence, metadata, user_tags, "
+                    "file_size, modified_date, original_date "
+                    f"FROM files WHERE file_path IN ({placeholders})",
+                    params,
+                )
+                for row in cursor.fetchall():
+                    existing[row['file_path']] = row
+        except Exception as e:
+            logger.debug(f"Could not look up existing rows: {e}")
+        return existing
+    
+    def _prepare_file_row(self, file_data: Dict[str, Any], existing: Optional[sqlite3.Row],
+                          indexed_date: str) -> tuple:
+        """
+        Build the files row for one file.
+        
+        Preserves AI/user fields already stored for the path (existing, from
+        _fetch_existing_rows) when file_data doesn't provide them. indexed_date
+        is the batch's ISO timestamp, also used for files that can't be stat'ed.
+        
+        Returns:
+            Parameter tuple for _INSERT_FILE_SQL
+        """
+        # Prepare data
+        file_path = file_data.get('source_path', '')
+        file_name = file_data.get('name', '')
+        file_extension = file_data.get('extension', '')
+        file_size = file_data.get('size', 0)
+        mime_type = file_data.get('mime_type', '')
+        category = file_data.get('category', 'Misc')
+        has_ocr = file_data.get('has_ocr', False)
+        ocr_text = file_data.get('ocr_text', '')
+
+        # Preserve existing AI/user-enriched fields if this update doesn't provide them.
+        # This prevents accidental wiping when a "refresh/reindex" path only recomputes basic metadata.
+        # label/caption: preserve if incoming empty
+        if existing is not None:
+            if not (file_data.get('label') or '').strip():
+                file_data['label'] = existing['label'] if 'label' in existing.keys() else file_data.get('label')
+            if not (file_data.get('caption') or '').strip():
+                file_data['caption'] = existing['caption'] if 'caption' in existing.keys() else file_data.get('caption')
+
+            # tags: preserve if incoming missing/empty
+            incoming_tags = file_data.get('tags')
+            incoming_list = incoming_tags if isinstance(incoming_tags, list) else _parse_tags_value(incoming_tags)
+            if not incoming_list:
+                prev_list = _parse_tags_value(existing['tags']) if 'tags' in existing.keys() else None
+                if prev_list:
+                    file_data['tags'] = prev_list
+
+            # ocr_text: preserve if incoming empty but existing has OCR text
+            if (not (ocr_text or '').strip()) and ('ocr_text' in existing.keys()) and (existing['ocr_text'] or '').strip():
+                ocr_text = existing['ocr_text']
+                has_ocr = bool(existing['has_ocr']) if 'has_ocr' in existing.keys() else has_ocr
+                file_data['ocr_text'] = ocr_text
+                file_data['has_ocr'] = has_ocr
+
+            # ai_source / vision_confidence: preserve if incoming missing
+            if file_data.get('ai_source') is None and 'ai_source' in existing.keys():
+                file_data['ai_source'] = existing['ai_source']
+            if file_data.get('vision_confidence') is None and 'vision_confidence' in existing.keys():
+                file_data['vision_confidence'] = existing['vision_confidence']
+        
+        # Get file dates (a single stat; missing files get the index time)
+        try:
+            stat = os.stat(file_path) if file_path else None
+        except (OSError, ValueError):
+            stat = None
+        if stat is not None:
+            created_date = datetime.fromtimestamp(stat.st_ctime).isoformat()
+            modified_date = datetime.fromtimestamp(stat.st_mtime).isoformat()
+        else:
+            created_date = modified_date = indexed_date
+        
+        # Try to get original date from file metadata (EXIF, Office docs, PDFs, etc.)
+        original_date = None
+        if (existing is not None and stat is not None and existing['original_date']
+                and existing['modified_date'] == modified_date and existing['file_size'] == stat.st_size):
+            # Same mtime and size as when it was indexed: reuse the stored date
+            # instead of reopening the file
+            original_date = existing['original_date']
+        else:
+            try:
+                from app.core.metadata_utils import get_file_original_date
+                orig_dt = get_file_original_date(file_path)
+                if orig_dt:
+                    original_date = orig_dt.isoformat()
+                    logger.debug(f"Original date for {file_name}: {original_date}")
+            except Exception as e:
+                logger.debug(f"Could not get original date for {file_name}: {e}")
+        
+        # Store additional metadata as JSON
+        metadata = {
+            'is_file': file_data.get('is_file', False),
+            'is_dir': file_data.get('is_dir', False),
+            'error': file_data.get('error', None),
+            # Persist extra AI details (not in main schema) for UI debug
+            'ai_type': file_data.get('type', None) or file_data.get('label', None),
+            'purpose': file_data.get('purpose', None),
+            'suggested_filename': file_data.get('suggested_filename', None),
+            'detected_text': file_data.get('detected_text', None),
+            'description': file_data.get('description', None),
+        }
+
+        # Merge existing metadata if present and new values are None
+        if existing is not None and 'metadata' in existing.keys() and existing['metadata']:
+            try:
+                prev_meta = _json_loads(existing['metadata']) if isinstance(existing['metadata'], str) else {}
+                if isinstance(prev_meta, dict):
+                    for k, v in prev_meta.items():
+                        if metadata.get(k) is None and v is not None:
+                            metadata[k] = v
+            except Exception:
+                pass
+        
+        file_row = (
+            file_path, file_name, file_extension, file_size,
+            mime_type, category, created_date, modified_date,
+            indexed_date, has_ocr, ocr_text,
+            file_data.get('label', None),
+            _json_dumps(file_data.get('tags', [])) if isinstance(file_data.get('tags'), list) else (file_data.get('tags') if isinstance(file_data.get('tags'), str) else None),
+            file_data.get('caption', None),
+            float(file_data.get('vision_confidence', 0)) if file_data.get('vision_confidence') is not None else None,
+            file_data.get('content_hash', None),
+            file_data.get('last_indexed_at', None),
+            file_data.get('ai_source', None),
+            _json_dumps(file_data.get('user_tags', [])) if isinstance(file_data.get('user_tags'), list) else (file_data.get('user_tags') if isinstance(file_data.get('user_tags'), str) else None),
+            _json_dumps(metadata),
+            original_date
+        )
+        return file_row
     
     def search_files(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -615,11 +1286,40 @@ class FileIndex:
             List of matching file dictionaries
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            # Plain dicts, so callers can annotate results (e.g. a rank)
+            results = [row.copy() for row in self.iter_search_files(query, limit)]
+            self._log_search(query, len(results))
+            logger.info(f"Search for '{query}' returned {len(results)} results")
+            return results
+        except Exception as e:
+            logger.error(f"Error searching files: {e}")
+            return []
 
-                # Use FTS5 bm25() ranking (lower is better). Fall back to LIKE on error.
+    def iter_search_files(self, query: str, limit: int = 50) -> Iterator[_LazyRow]:
+        """
+        Stream full-text search results as they are fetched.
+        
+        Rows are read in small batches and tags/metadata are only decoded when
+        accessed, so callers that stop early skip the rest. Rows are read-only
+        mappings (copy() gives a dict). Unlike search_files, the query is not
+        written to search history.
+        
+        Args:
+            query: Search query string
+            limit: Maximum number of results
+            
+        Yields:
+            Read-only file mappings, best match first
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.arraysize = 64
+
+            # Use FTS5 bm25() ranking (lower is better). Fall back to LIKE on
+            # error, or right away while the FTS index is being rebuilt.
+            rows = None
+            if self._fts_ok:
                 try:
                     cursor.execute(
                         """
@@ -632,112 +1332,117 @@ class FileIndex:
                         """,
                         (query, limit),
                     )
-                    rows = cursor.fetchall()
-                except Exception:
-                    # Fallback: simple LIKE across several columns
-                    like = f"%{query}%"
-                    cursor.execute(
-                        """
-                        SELECT *, 0 AS rank FROM files
-                        WHERE file_name LIKE ? OR category LIKE ? OR ocr_text LIKE ? OR caption LIKE ? OR tags LIKE ?
-                        ORDER BY file_name
-                        LIMIT ?
-                        """,
-                        (like, like, like, like, like, limit),
-                    )
-                    rows = cursor.fetchall()
+                    rows = cursor.fetchmany()
+                except Exception as e:
+                    if _is_corruption_error(e):
+                        logger.warning("FTS index corrupted, triggering auto-rebuild...")
+                        self._schedule_fts_rebuild()
+            if rows is None:
+                # Fallback: simple LIKE across several columns
+                like = f"%{query}%"
+                cursor.execute(
+                    """
+                    SELECT *, 0 AS rank FROM files
+                    WHERE file_name LIKE ? OR category LIKE ? OR ocr_text LIKE ? OR caption LIKE ? OR tags LIKE ?
+                    ORDER BY file_name
+                    LIMIT ?
+                    """,
+                    (like, like, like, like, like, limit),
+                )
+                rows = cursor.fetchmany()
 
-                results = []
+            columns = frozenset(column[0] for column in cursor.description)
+            while rows:
                 for row in rows:
-                    file_dict = {
-                        'id': row['id'],
-                        'file_path': row['file_path'],
-                        'file_name': row['file_name'],
-                        'file_extension': row['file_extension'],
-                        'file_size': row['file_size'],
-                        'mime_type': row['mime_type'],
-                        'category': row['category'],
-                        'created_date': row['created_date'],
-                        'modified_date': row['modified_date'],
-                        'indexed_date': row['indexed_date'],
-                        'original_date': row['original_date'] if 'original_date' in row.keys() else None,
-                        'has_ocr': bool(row['has_ocr']),
-                        'ocr_text': row['ocr_text'],
-                        'label': row['label'] if 'label' in row.keys() else None,
-                        'tags': _parse_tags_value(row['tags']),
-                        'caption': row['caption'] if 'caption' in row.keys() else None,
-                        'vision_confidence': row['vision_confidence'] if 'vision_confidence' in row.keys() else None,
-                        'metadata': json.loads(row['metadata']) if row['metadata'] else {},
-                        'rank': row['rank'] if 'rank' in row.keys() else 0,
-                    }
-                    results.append(file_dict)
-
-                self._log_search(query, len(results))
-                logger.info(f"Search for '{query}' returned {len(results)} results")
-                return results
-
-        except Exception as e:
-            logger.error(f"Error searching files: {e}")
-            return []
+                    yield _LazyRow(row, columns)
+                rows = cursor.fetchmany()
 
     def search_files_advanced(
         self, fts_terms: List[str], filters: Dict[str, Any], limit: int = 50
     ) -> List[Dict[str, Any]]:
         """Search with parsed terms/filters, with robust fallbacks."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
 
                 # Build FTS MATCH string using prefix queries per token
-                # Example: thumbnail -> 'thumbnail*'
+                # Example: thumbnail -> '"thumbnail"*'
                 # Join with OR to broaden matches across tokens
                 if fts_terms:
-                    # Use FTS5 prefix matching without quotes: token*
-                    tokens = [f"{t}*" for t in fts_terms]
+                    # Quote each token so punctuation (c++, q3-report) can't
+                    # turn the MATCH into a syntax error
+                    tokens = ['"' + t.replace('"', '""') + '"*' for t in fts_terms]
                     match = " OR ".join(tokens)
                 else:
                     match = None
 
                 # Base FTS query
-                sql = (
-                    "SELECT f.*, 1 as rank FROM files f "
-                    "JOIN files_fts ON f.id = files_fts.rowid "
-                )
                 params: List[Any] = []
                 if match:
-                    sql += "WHERE files_fts MATCH ?"
-                    params.append(match)
+                    # Resolve the MATCH in a CTE first so the planner always
+                    # drives from the FTS index, then seek files by id.
+                    has_filters = any(filters.get(k) for k in ("label", "has_ocr", "has_vision", "tags"))
+                    if has_filters:
+                        # Every match must reach the filters - a bm25 window
+                        # would silently drop filtered-in files outside it
+                        cte = (
+                            f"WITH fts_matches AS {_CTE_MATERIALIZED}("
+                            "SELECT rowid FROM files_fts WHERE files_fts MATCH ?) "
+                        )
+                        params.append(match)
+                    else:
+                        # The inner LIMIT keeps the CTE from being flattened
+                        # and returns the most relevant matches
+                        cte = (
+                            "WITH fts_matches AS ("
+                            "SELECT rowid, bm25(files_fts) AS r FROM files_fts "
+                            "WHERE files_fts MATCH ? ORDER BY r LIMIT ?) "
+                        )
+                        params.extend([match, limit])
+                    sql = (
+                        cte +
+                        f"SELECT {_FILE_COLUMNS_SQL_F} FROM fts_matches fm "
+                        "JOIN files f ON f.id = fm.rowid "
+                        "WHERE 1=1"
+                    )
                 else:
-                    sql += "WHERE 1=1"
+                    # Filter-only search: nothing for the FTS index to do
+                    sql = f"SELECT {_FILE_COLUMNS_SQL_F} FROM files f WHERE 1=1"
 
                 # Filters
                 if filters.get("label"):
-                    sql += " AND (f.label = ? OR f.label LIKE ?)"
-                    lbl = filters["label"]
-                    params.extend([lbl, f"%{lbl}%"])
+                    # Case-insensitive contains; an equal label matches too
+                    sql += " AND f.label LIKE ?"
+                    params.append(f"%{filters['label']}%")
                 if filters.get("has_ocr"):
                     sql += " AND f.has_ocr = 1"
                 if filters.get("has_vision"):
                     sql += " AND (f.label IS NOT NULL OR f.caption IS NOT NULL)"
-                if filters.get("tags"):
-                    # simple LIKE match on serialized tags
-                    for tg in filters["tags"]:
-                        sql += " AND f.tags LIKE ?"
-                        params.append(f"%{tg}%")
+                tag_sql, tag_params = self._tag_filter(filters.get("tags"))
+                sql += tag_sql
+                params.extend(tag_params)
 
                 sql += " ORDER BY f.file_name LIMIT ?"
                 params.append(limit)
 
-                try:
-                    cursor.execute(sql, params)
-                    rows = cursor.fetchall()
-                except Exception:
-                    rows = []
+                fts_failed = bool(match) and not self._fts_ok
+                if not fts_failed:
+                    try:
+                        cursor.execute(sql, params)
+                        rows = cursor.fetchall()
+                    except sqlite3.DatabaseError as fts_err:
+                        rows = []
+                        fts_failed = bool(match)
+                        # Heal a corrupted index in the background; until then
+                        # searches go straight to the LIKE scan below
+                        if match and _is_corruption_error(fts_err):
+                            logger.warning("FTS index corrupted, triggering auto-rebuild...")
+                            self._schedule_fts_rebuild()
 
-                # If FTS returns nothing or was skipped, fallback to LIKE
-                if not rows:
-                    sql2 = "SELECT * FROM files WHERE 1=1"
+                # Only scan with LIKE when the FTS index itself is unusable;
+                # an empty prefix-OR match is an answer, not a failure
+                if fts_failed:
+                    sql2 = f"SELECT {_FILE_COLUMNS_SQL_F} FROM files f WHERE 1=1"
                     p2: List[Any] = []
                     if fts_terms:
                         # Build ORs per token for broader LIKE search
@@ -755,52 +1460,57 @@ class FileIndex:
                             p2.extend([pattern, pattern, pattern, pattern, pattern])
                     # Filters
                     if filters.get("label"):
-                        sql2 += " AND (label = ? OR label LIKE ?)"
-                        lbl = filters["label"]
-                        p2.extend([lbl, f"%{lbl}%"])
+                        sql2 += " AND label LIKE ?"
+                        p2.append(f"%{filters['label']}%")
                     if filters.get("has_ocr"):
                         sql2 += " AND has_ocr = 1"
                     if filters.get("has_vision"):
                         sql2 += " AND (label IS NOT NULL OR caption IS NOT NULL)"
+                    sql2 += tag_sql
+                    p2.extend(tag_params)
                     sql2 += " ORDER BY file_name LIMIT ?"
                     p2.append(limit)
                     cursor.execute(sql2, p2)
                     rows = cursor.fetchall()
 
                 results = []
+                append = results.append
+                row_to_dict = _row_to_dict
                 for row in rows:
-                    # row is sqlite3.Row; access by column names to avoid index drift
                     try:
-                        results.append({
-                            'id': row['id'],
-                            'file_path': row['file_path'],
-                            'file_name': row['file_name'],
-                            'file_extension': row['file_extension'],
-                            'file_size': row['file_size'],
-                            'mime_type': row['mime_type'],
-                            'category': row['category'],
-                            'created_date': row['created_date'],
-                            'modified_date': row['modified_date'],
-                            'indexed_date': row['indexed_date'],
-                            'original_date': row['original_date'] if 'original_date' in row.keys() else None,
-                            'has_ocr': bool(row['has_ocr']),
-                            'ocr_text': row['ocr_text'],
-                            'label': row['label'] if 'label' in row.keys() else None,
-                            'tags': _parse_tags_value(row['tags']),
-                            'caption': row['caption'] if 'caption' in row.keys() else None,
-                            'ai_source': row['ai_source'] if 'ai_source' in row.keys() else None,
-                            'vision_confidence': row['vision_confidence'] if 'vision_confidence' in row.keys() else None,
-                            'metadata': json.loads(row['metadata']) if row['metadata'] else {},
-                            'rank': 0,
-                        })
+                        file_dict = row_to_dict(row)
                     except Exception:
                         # If any column missing/malformed, skip gracefully
                         continue
+                    file_dict['rank'] = 0
+                    append(file_dict)
                 return results
         except Exception as e:
             logger.error(f"Advanced search error: {e}")
             return []
     
+    def _tag_filter(self, tags: Optional[List[str]]) -> tuple:
+        """
+        WHERE clause (for files aliased as f) requiring a tag containing each term.
+        
+        Uses the normalized file_tags index when available, else LIKE on the
+        serialized tags column.
+        
+        Returns:
+            (sql, params)
+        """
+        sql = ""
+        params: List[Any] = []
+        for tg in tags or []:
+            if self._tag_index:
+                sql += _TAG_FILTER_SQL
+                params.extend([f"%{tg}%", f"%{tg}%"])
+            else:
+                # simple LIKE match on serialized tags
+                sql += " AND f.tags LIKE ?"
+                params.append(f"%{tg}%")
+        return sql, params
+    
     def get_file_by_name(self, file_name: str) -> Optional[Dict[str, Any]]:
         """
         Get file information by filename (not full path).
@@ -813,35 +1523,11 @@ class FileIndex:
             File dictionary or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM files WHERE file_name = ?", (file_name,))
+                cursor.execute(f"SELECT {_FILE_COLUMNS_SQL} FROM files WHERE file_name = ?", (file_name,))
                 row = cursor.fetchone()
-                
-                if row:
-                    return {
-                        'id': row['id'],
-                        'file_path': row['file_path'],
-                        'file_name': row['file_name'],
-                        'file_extension': row['file_extension'],
-                        'file_size': row['file_size'],
-                        'mime_type': row['mime_type'],
-                        'category': row['category'],
-                        'created_date': row['created_date'],
-                        'modified_date': row['modified_date'],
-                        'indexed_date': row['indexed_date'],
-                        'original_date': row['original_date'] if 'original_date' in row.keys() else None,
-                        'has_ocr': bool(row['has_ocr']),
-                        'ocr_text': row['ocr_text'],
-                        'label': row['label'] if 'label' in row.keys() else None,
-                        'tags': _parse_tags_value(row['tags']),
-                        'caption': row['caption'] if 'caption' in row.keys() else None,
-                        'vision_confidence': row['vision_confidence'] if 'vision_confidence' in row.keys() else None,
-                        'content_hash': row['content_hash'] if 'content_hash' in row.keys() else None,
-                        'metadata': json.loads(row['metadata']) if row['metadata'] else {}
-                    }
-                return None
+                return _row_to_dict(row) if row else None
                 
         except Exception as e:
             logger.error(f"Error getting file by name {file_name}: {e}")
@@ -858,35 +1544,11 @@ class FileIndex:
             File dictionary or None if not found
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM files WHERE file_path = ?", (file_path,))
+                cursor.execute(f"SELECT {_FILE_COLUMNS_SQL} FROM files WHERE file_path = ?", (file_path,))
                 row = cursor.fetchone()
-                
-                if row:
-                    return {
-                        'id': row['id'],
-                        'file_path': row['file_path'],
-                        'file_name': row['file_name'],
-                        'file_extension': row['file_extension'],
-                        'file_size': row['file_size'],
-                        'mime_type': row['mime_type'],
-                        'category': row['category'],
-                        'created_date': row['created_date'],
-                        'modified_date': row['modified_date'],
-                        'indexed_date': row['indexed_date'],
-                        'original_date': row['original_date'] if 'original_date' in row.keys() else None,
-                        'has_ocr': bool(row['has_ocr']),
-                        'ocr_text': row['ocr_text'],
-                        'label': row['label'] if 'label' in row.keys() else None,
-                        'tags': _parse_tags_value(row['tags']),
-                        'caption': row['caption'] if 'caption' in row.keys() else None,
-                        'vision_confidence': row['vision_confidence'] if 'vision_confidence' in row.keys() else None,
-                        'content_hash': row['content_hash'] if 'content_hash' in row.keys() else None,
-                        'metadata': json.loads(row['metadata']) if row['metadata'] else {}
-                    }
-                return None
+                return _row_to_dict(row) if row else None
                 
         except Exception as e:
             logger.error(f"Error getting file {file_path}: {e}")
@@ -901,7 +1563,7 @@ class FileIndex:
         if not content_hash:
             return None
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute(
@@ -930,13 +1592,10 @@ class FileIndex:
             Set of filenames (without path) that have non-empty tags
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 # Get filenames where tags is not null and not empty
-                cursor.execute("""
-                    SELECT file_name FROM files 
-                    WHERE tags IS NOT NULL AND tags != '' AND tags != '[]'
-                """)
+                cursor.execute(f"SELECT file_name FROM files WHERE {_HAS_TAGS_SQL}")
                 rows = cursor.fetchall()
                 return {row[0] for row in rows}
         except Exception as e:
@@ -953,7 +1612,7 @@ class FileIndex:
             Set of normalized, lowercased full file paths that are indexed (have tags)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT file_path FROM files 
@@ -974,7 +1633,7 @@ class FileIndex:
             Number of files in the database
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM files")
                 return cursor.fetchone()[0]
@@ -984,78 +1643,140 @@ class FileIndex:
 
     # ---------- Embeddings helpers ----------
     def upsert_embedding(self, file_id: int, model: str, vector: List[float]) -> None:
+        self.batch_upsert_embeddings([(file_id, model, vector)])
+
+    def batch_upsert_embeddings(self, items: List[tuple]) -> int:
+        """
+        Insert or replace many embeddings in one transaction.
+        
+        Args:
+            items: (file_id, model, vector) tuples
+            
+        Returns:
+            Number of embeddings written
+        """
+        updated_at = datetime.now().isoformat()
+        rows = []
+        for file_id, model, vector in items:
+            try:
+                blob, dtype = _pack_vector(vector)
+            except Exception as e:
+                logger.error(f"Error packing embedding for {file_id}: {e}")
+                continue
+            rows.append((file_id, model, len(vector), blob, dtype, updated_at))
+        if not rows:
+            return 0
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT INTO embeddings(file_id, model, dim, vector, updated_at)
-                    VALUES(?, ?, ?, ?, ?)
-                    ON CONFLICT(file_id) DO UPDATE SET
-                        model=excluded.model,
-                        dim=excluded.dim,
-                        vector=excluded.vector,
-                        updated_at=excluded.updated_at
-                    """,
-                    (file_id, model, len(vector), json.dumps(vector), datetime.now().isoformat()),
-                )
-                conn.commit()
+            with self._connect() as conn:
+                conn.executemany(_UPSERT_EMBEDDING_SQL, rows)
+            return len(rows)
         except Exception as e:
-            logger.error(f"Error upserting embedding for {file_id}: {e}")
+            logger.error(f"Error upserting {len(rows)} embeddings: {e}")
+            return 0
+
+    def iter_embeddings(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream stored embeddings, decoding each batch as it is fetched.
+        
+        Yields:
+            Dicts with file_id, model, dim and vector (array('f'))
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = 1024
+            # Join files so a vector orphaned by an interrupted delete is skipped
+            cursor.execute(
+                "SELECT e.file_id, e.model, e.dim, e.vector, e.dtype "
+                "FROM emb.embeddings e JOIN files f ON f.id = e.file_id"
+            )
+            rows = cursor.fetchmany()
+            while rows:
+                for file_id, model, dim, vector, dtype in rows:
+                    yield {
+                        'file_id': file_id,
+                        'model': model,
+                        'dim': dim,
+                        'vector': _unpack_vector(vector, dtype),
+                    }
+                rows = cursor.fetchmany()
 
     def get_all_embeddings(self) -> List[Dict[str, Any]]:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM embeddings")
-                rows = cursor.fetchall()
-                return [
-                    {
-                        'file_id': r['file_id'],
-                        'model': r['model'],
-                        'dim': r['dim'],
-                        'vector': json.loads(r['vector']) if r['vector'] else [],
-                    }
-                    for r in rows
-                ]
+            return list(self.iter_embeddings())
         except Exception as e:
             logger.error(f"Error reading embeddings: {e}")
             return []
 
+    def get_embedding_matrix(self, dim: int, model: Optional[str] = None) -> tuple:
+        """
+        Load every stored vector of the given dimension, L2-normalized.
+        
+        Normalizing once here turns cosine similarity into a plain dot product
+        with a normalized query: ``matrix @ query`` when numpy is available.
+        
+        Returns:
+            (file_ids, matrix) where matrix is an (N, dim) float32 ndarray, or
+            a list of array('f') rows if numpy isn't installed
+        """
+        where = "FROM emb.embeddings e JOIN files f ON f.id = e.file_id WHERE e.dim = ?"
+        params: List[Any] = [dim]
+        if model:
+            where += " AND e.model = ?"
+            params.append(model)
+        file_ids: List[int] = []
+        vectors = []
+        try:
+            with self._connect() as conn:
+                if np is not None:
+                    # Preallocate and fill straight from the cursor, so the
+                    # BLOBs are never all held in a row list at once
+                    count = conn.execute(f"SELECT COUNT(*) {where}", params).fetchone()[0]
+                    matrix = np.empty((count, dim), dtype=np.float32)
+                    for file_id, blob, dtype in conn.execute(f"SELECT e.file_id, e.vector, e.dtype {where}", params):
+                        if len(file_ids) == count:
+                            # Added since the count; the next search sees it
+                            break
+                        if dtype == 'f32':
+                            matrix[len(file_ids)] = np.frombuffer(blob, dtype='<f4')
+                        else:
+                            matrix[len(file_ids)] = _unpack_vector(blob, dtype)
+                        file_ids.append(file_id)
+                    matrix = matrix[:len(file_ids)]
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    norms[norms == 0] = 1.0
+                    matrix /= norms
+                    return file_ids, matrix
+                
+                for file_id, blob, dtype in conn.execute(f"SELECT e.file_id, e.vector, e.dtype {where}", params):
+                    vec = _unpack_vector(blob, dtype)
+                    norm = sum(x * x for x in vec) ** 0.5 or 1.0
+                    vectors.append(array('f', (x / norm for x in vec)))
+                    file_ids.append(file_id)
+        except Exception as e:
+            logger.error(f"Error reading embeddings: {e}")
+            file_ids, vectors = [], []
+            if np is not None:
+                return file_ids, np.empty((0, dim), dtype=np.float32)
+        return file_ids, vectors
+
     def get_files_by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
         if not ids:
             return []
         try:
-            placeholders = ",".join(["?"] * len(ids))
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute(f"SELECT * FROM files WHERE id IN ({placeholders})", ids)
-                rows = cursor.fetchall()
-                out: List[Dict[str, Any]] = []
-                for row in rows:
-                    out.append({
-                        'id': row['id'],
-                        'file_path': row['file_path'],
-                        'file_name': row['file_name'],
-                        'file_extension': row['file_extension'],
-                        'file_size': row['file_size'],
-                        'mime_type': row['mime_type'],
-                        'category': row['category'],
-                        'created_date': row['created_date'],
-                        'modified_date': row['modified_date'],
-                        'indexed_date': row['indexed_date'],
-                        'original_date': row['original_date'] if 'original_date' in row.keys() else None,
-                        'has_ocr': bool(row['has_ocr']),
-                        'ocr_text': row['ocr_text'],
-                        'label': row['label'],
-                        'tags': _parse_tags_value(row['tags']),
-                        'caption': row['caption'],
-                        'vision_confidence': row['vision_confidence'],
-                        'metadata': json.loads(row['metadata']) if row['metadata'] else {},
-                    })
-                return out
+                if self._tag_index:
+                    # JSON functions available: one statement for any number
+                    # of ids, with no bound-variable limit
+                    cursor.execute(_FILES_BY_JSON_IDS_SQL, (_json_dumps(list(ids)),))
+                    # Iterate the cursor: rows are converted as they are stepped
+                    return [_row_to_dict(row) for row in cursor]
+                results = []
+                for start in range(0, len(ids), _PRESERVE_LOOKUP_CHUNK):
+                    placeholders, params = _padded_in_params(ids[start:start + _PRESERVE_LOOKUP_CHUNK])
+                    cursor.execute(f"SELECT {_FILE_COLUMNS_SQL} FROM files WHERE id IN ({placeholders})", params)
+                    results.extend(_row_to_dict(row) for row in cursor)
+                return results
         except Exception as e:
             logger.error(f"Error fetching files by ids: {e}")
             return []
@@ -1068,25 +1789,16 @@ class FileIndex:
             Dictionary with statistics
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                # Total files
-                cursor.execute("SELECT COUNT(*) FROM files")
-                total_files = cursor.fetchone()[0]
-                
-                # Files with OCR
-                cursor.execute("SELECT COUNT(*) FROM files WHERE has_ocr = 1")
-                files_with_ocr = cursor.fetchone()[0]
-                
-                # Total size
-                cursor.execute("SELECT SUM(file_size) FROM files")
-                total_size = cursor.fetchone()[0] or 0
-                
-                # Categories
-                cursor.execute("SELECT category, COUNT(*) FROM files GROUP BY category")
-                categories = dict(cursor.fetchall())
+            with self._connect() as conn:
+                # One scan: per-category counts, rolled up into the totals
+                rows = conn.execute(
+                    "SELECT category, COUNT(*), SUM(has_ocr = 1), SUM(file_size) "
+                    "FROM files GROUP BY category"
+                ).fetchall()
+                categories = {row[0]: row[1] for row in rows}
+                total_files = sum(row[1] for row in rows)
+                files_with_ocr = sum(row[2] or 0 for row in rows)
+                total_size = sum(row[3] or 0 for row in rows)
                 
                 return {
                     'total_files': total_files,
@@ -1101,17 +1813,52 @@ class FileIndex:
             return {}
     
     def _log_search(self, query: str, results_count: int):
-        """Log search query."""
+        """Queue a search query for the history writer thread."""
+        self._search_log.put_nowait((query, datetime.now().isoformat(), results_count))
+        if self._search_log_thread is None:
+            with self._search_log_lock:
+                if self._search_log_thread is None:
+                    self._search_log_thread = threading.Thread(
+                        target=self._search_log_writer, name="search-log-writer", daemon=True
+                    )
+                    self._search_log_thread.start()
+    
+    def _search_log_writer(self):
+        """Insert queued searches in batches, one transaction per interval."""
+        while True:
+            batch = [self._search_log.get()]
+            deadline = time.monotonic() + _SEARCH_LOG_FLUSH_INTERVAL
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._search_log.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_search_log(batch)
+    
+    def _write_search_log(self, batch: List[tuple]):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO search_history (query, timestamp, results_count)
-                    VALUES (?, ?, ?)
-                """, (query, datetime.now().isoformat(), results_count))
-                conn.commit()
+            with self._connect() as conn:
+                conn.executemany(_INSERT_SEARCH_LOG_SQL, batch)
         except Exception as e:
             logger.error(f"Error logging search: {e}")
+        finally:
+            for _ in batch:
+                self._search_log.task_done()
+    
+    def flush_search_log(self):
+        """Write any queued search history now and wait for the writer thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._search_log.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_search_log(batch)
+        self._search_log.join()
     
     def get_search_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -1123,8 +1870,9 @@ class FileIndex:
         Returns:
             List of search history entries
         """
+        self.flush_search_log()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT query, timestamp, results_count 
@@ -1149,12 +1897,11 @@ class FileIndex:
     def clear_index(self):
         """Clear all indexed files, FTS index, and embeddings."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 # Delete from all related tables
                 cursor.execute("DELETE FROM files")
-                cursor.execute("DELETE FROM files_fts")
-                cursor.execute("DELETE FROM embeddings")
+                cursor.execute("DELETE FROM emb.embeddings")
                 conn.commit()
                 logger.info("File index cleared (files, files_fts, embeddings)")
         except Exception as e:
@@ -1181,7 +1928,7 @@ class FileIndex:
             logger.warning("Metadata utils not available, skipping metadata extraction")
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Get all file paths
@@ -1191,43 +1938,32 @@ class FileIndex:
                 
                 logger.info(f"Resyncing dates for {total} files (including EXIF extraction)...")
                 
-                for i, (file_id, file_path) in enumerate(files):
-                    try:
-                        path_obj = Path(file_path)
-                        if path_obj.exists():
-                            stat = path_obj.stat()
-                            created_date = datetime.fromtimestamp(stat.st_ctime).isoformat()
-                            modified_date = datetime.fromtimestamp(stat.st_mtime).isoformat()
-                            
-                            # Try to extract original date from file metadata
-                            original_date = None
-                            if get_file_original_date:
-                                try:
-                                    orig_dt = get_file_original_date(file_path)
-                                    if orig_dt:
-                                        original_date = orig_dt.isoformat()
-                                        stats['exif_found'] += 1  # Keep stat name for compatibility
-                                        logger.debug(f"Metadata date for {path_obj.name}: {original_date}")
-                                except Exception as e:
-                                    logger.debug(f"Metadata extraction failed for {file_path}: {e}")
-                            
-                            cursor.execute("""
-                                UPDATE files 
-                                SET created_date = ?, modified_date = ?, original_date = ?
-                                WHERE id = ?
-                            """, (created_date, modified_date, original_date, file_id))
-                            
-                            stats['updated'] += 1
+                # Read every file first (stat and metadata reads are I/O bound,
+                # so overlap them across threads), then write all rows in one
+                # statement so the write lock isn't held during the reads
+                updates = []
+                with ThreadPoolExecutor(max_workers=16) as executor:
+                    results = executor.map(
+                        lambda row: _read_file_dates(row[1], get_file_original_date), files
+                    )
+                    for i, ((file_id, _), (status, dates)) in enumerate(zip(files, results)):
+                        if status == 'updated':
+                            updates.append((*dates, file_id))
+                            if dates[2]:
+                                stats['exif_found'] += 1  # Keep stat name for compatibility
                         else:
-                            stats['not_found'] += 1
-                            logger.debug(f"File not found: {file_path}")
-                    except Exception as e:
-                        stats['errors'] += 1
-                        logger.warning(f"Error updating dates for {file_path}: {e}")
-                    
-                    if progress_callback and (i % 10 == 0 or i == total - 1):
-                        progress_callback(i + 1, total)
-                
+                            stats[status] += 1
+                        
+                        if progress_callback and (i % 10 == 0 or i == total - 1):
+                            progress_callback(i + 1, total)
+                
+                if updates:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    cursor.executemany(
+                        "UPDATE files SET created_date = ?, modified_date = ?, original_date = ? WHERE id = ?",
+                        updates,
+                    )
+                    stats['updated'] = len(updates)
                 conn.commit()
                 logger.info(f"Resync complete: {stats['updated']} updated, {stats['exif_found']} with metadata dates, {stats['not_found']} not found, {stats['errors']} errors")
                 
@@ -1237,6 +1973,31 @@ class FileIndex:
         
         return stats
     
+    def _probe_fts(self) -> bool:
+        """Return whether files_fts can be read (checked once at startup)."""
+        try:
+            with self._connect() as conn:
+                conn.execute("SELECT 1 FROM files_fts LIMIT 1").fetchall()
+            return True
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"FTS index unusable, searching without it until rebuilt: {e}")
+            return False
+
+    def _schedule_fts_rebuild(self):
+        """Mark FTS unusable and rebuild it on a background thread."""
+        self._fts_ok = False
+        if not self._fts_rebuild_lock.acquire(blocking=False):
+            # A rebuild is already running
+            return
+
+        def rebuild():
+            try:
+                self._auto_rebuild_fts()
+            finally:
+                self._fts_rebuild_lock.release()
+
+        threading.Thread(target=rebuild, name="fts-rebuild", daemon=True).start()
+
     def _auto_rebuild_fts(self):
         """
         Automatically rebuild FTS index when corruption is detected.
@@ -1251,40 +2012,20 @@ class FileIndex:
         logger.info("Auto-rebuilding corrupted FTS index...")
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                # Drop corrupted FTS table
-                try:
-                    cursor.execute("DROP TABLE IF EXISTS files_fts")
-                except Exception as e:
-                    logger.warning(f"Error dropping FTS table: {e}")
-                
-                # Recreate FTS table
-                cursor.execute("""
-                    CREATE VIRTUAL TABLE files_fts USING fts5(
-                        file_name,
-                        file_path,
-                        category,
-                        ocr_text,
-                        caption,
-                        tags,
-                        content='files',
-                        content_rowid='id'
-                    )
-                """)
-                
-                # Populate from main table
-                cursor.execute("""
-                    INSERT INTO files_fts(rowid, file_name, file_path, category, ocr_text, caption, tags)
-                    SELECT id, file_name, file_path, category, ocr_text, caption, tags 
-                    FROM files
-                """)
+                # Replace the corrupted FTS table and repopulate it; one
+                # transaction so a failed rebuild keeps the old table
+                if not conn.in_transaction:
+                    cursor.execute("BEGIN IMMEDIATE")
+                self._recreate_fts(cursor)
                 
                 conn.commit()
                 
                 # Mark as rebuilt this session
                 self._fts_rebuilt_this_session = True
+                self._fts_ok = True
                 
                 # Count rows
                 cursor.execute("SELECT COUNT(*) FROM files")
@@ -1307,7 +2048,7 @@ class FileIndex:
         stats = {'total': 0, 'indexed': 0, 'errors': 0}
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Get total count
@@ -1320,49 +2061,17 @@ class FileIndex:
                 
                 logger.info(f"Rebuilding FTS index for {stats['total']} files...")
                 
-                # Drop and recreate FTS table
-                try:
-                    cursor.execute("DROP TABLE IF EXISTS files_fts")
-                except Exception as e:
-                    logger.warning(f"Error dropping FTS table: {e}")
-                
-                # Recreate FTS table
-                cursor.execute("""
-                    CREATE VIRTUAL TABLE files_fts USING fts5(
-                        file_name,
-                        file_path,
-                        category,
-                        ocr_text,
-                        caption,
-                        tags,
-                        content='files',
-                        content_rowid='id'
-                    )
-                """)
-                
-                # Get all files
-                cursor.execute("""
-                    SELECT id, file_name, file_path, category, ocr_text, caption, tags
-                    FROM files
-                """)
-                rows = cursor.fetchall()
-                
-                # Insert into FTS index
-                for i, row in enumerate(rows):
-                    try:
-                        cursor.execute("""
-                            INSERT INTO files_fts(rowid, file_name, file_path, category, ocr_text, caption, tags)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, row)
-                        stats['indexed'] += 1
-                    except Exception as e:
-                        stats['errors'] += 1
-                        logger.warning(f"Error indexing file {row[0]}: {e}")
-                    
-                    if progress_callback and (i % 50 == 0 or i == len(rows) - 1):
-                        progress_callback(i + 1, len(rows))
+                # Drop, recreate and repopulate the FTS table in one
+                # transaction; DDL would otherwise autocommit and a failed
+                # 'rebuild' would leave search without an index
+                cursor.execute("BEGIN IMMEDIATE")
+                self._recreate_fts(cursor)
+                stats['indexed'] = stats['total']
                 
                 conn.commit()
+                self._fts_ok = True
+                if progress_callback:
+                    progress_callback(stats['total'], stats['total'])
                 logger.info(f"FTS rebuild complete: {stats['indexed']}/{stats['total']} indexed, {stats['errors']} errors")
                 
         except Exception as e:
@@ -3,46 +3,56 @@ Local embedding client using Ollama (nomic-embed-text).
 Falls back gracefully if Ollama/model unavailable.
 """
 
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 import requests
 
 OLLAMA_URL = "http://localhost:11434"
 EMBED_MODEL = "nomic-embed-text"
 
+# How long a model availability check is trusted before /api/tags is asked again
+MODEL_CHECK_TTL = 60.0
 
-def _ollama_alive() -> bool:
-    try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=2)
-        return r.ok
-    except Exception:
-        return False
+# Keep-alive session so repeated embedding calls reuse one connection
+_session = requests.Session()
+
+# model -> (available, monotonic time the answer expires)
+_model_checks: Dict[str, tuple] = {}
 
 
 def _model_available(model: str) -> bool:
     """Return True if the embed model is already available locally.
     We do not trigger pulls here to honor "local-only" usage.
+
+    One /api/tags request answers both "is Ollama running" and "is the model
+    installed"; the answer is cached for MODEL_CHECK_TTL seconds.
     """
+    cached = _model_checks.get(model)
+    now = time.monotonic()
+    if cached is not None and now < cached[1]:
+        return cached[0]
     try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=2)
+        r = _session.get(f"{OLLAMA_URL}/api/tags", timeout=2)
         if not r.ok:
-            return False
-        data = r.json() or {}
-        models = data.get("models") or []
-        names = {m.get("name") for m in models if isinstance(m, dict)}
-        return model in names
+            available = False
+        else:
+            data = r.json() or {}
+            models = data.get("models") or []
+            names = {m.get("name") for m in models if isinstance(m, dict)}
+            available = model in names
     except Exception:
-        return False
+        available = False
+    _model_checks[model] = (available, now + MODEL_CHECK_TTL)
+    return available
 
 
 def embed_text(text: str, model: str = EMBED_MODEL) -> Optional[List[float]]:
     try:
-        if not _ollama_alive():
-            return None
         # Use only locally available model; do not pull
         if not _model_available(model):
             return None
         payload = {"model": model, "input": text}
-        r = requests.post(f"{OLLAMA_URL}/api/embeddings", json=payload, timeout=20)
+        r = _session.post(f"{OLLAMA_URL}/api/embeddings", json=payload, timeout=20)
         if not r.ok:
             return None
         out = r.json()
@@ -54,3 +64,22 @@ def embed_text(text: str, model: str = EMBED_MODEL) -> Optional[List[float]]:
         return None
 
 
+def batch_embed_texts(texts: List[str], model: str = EMBED_MODEL) -> List[Optional[List[float]]]:
+    """Embed many texts with one request to Ollama's /api/embed endpoint.
+
+    Returns one vector (or None) per input text. Falls back to embed_text per
+    item if the server rejects the batch (e.g. an Ollama without /api/embed).
+    """
+    if not texts:
+        return []
+    try:
+        if not _model_available(model):
+            return [None] * len(texts)
+        r = _session.post(f"{OLLAMA_URL}/api/embed", json={"model": model, "input": texts}, timeout=60)
+        if r.ok:
+            vecs = (r.json() or {}).get("embeddings")
+            if isinstance(vecs, list) and len(vecs) == len(texts):
+                return [[float(x) for x in vec] if isinstance(vec, list) else None for vec in vecs]
+    except Exception:
+        pass
+    return [embed_text(text, model) for text in texts]
@@ -3,12 +3,35 @@ EXIF metadata extraction utilities.
 Extracts original creation dates from images that preserve this information.
 """
 import logging
+import os
+import struct
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Imported once here rather than on every get_exif_date call
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# Register the HEIC/HEIF opener once, if pillow-heif is installed
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+# Tag in IFD0 pointing to the Exif sub-IFD (ExifTags.IFD.Exif)
+_EXIF_IFD_POINTER = 0x8769
+
+# Bytes read from the start of a JPEG to find its EXIF segment (APP1 is at
+# most 64 KB and comes before the image data)
+_JPEG_HEADER_BYTES = 65536 + 1024
+
 # File extensions that typically contain EXIF data
 EXIF_SUPPORTED_EXTENSIONS = {
     '.jpg', '.jpeg', '.tiff', '.tif', '.heic', '.heif',
@@ -16,10 +39,131 @@ EXIF_SUPPORTED_EXTENSIONS = {
 }
 
 
+def _tiff_exif_dates(tiff: bytes) -> Optional[List[Optional[str]]]:
+    """
+    Read the date tags from a TIFF-structured EXIF block.
+    
+    Returns:
+        [DateTimeOriginal, DateTimeDigitized, DateTime] (None where absent),
+        or None if the block can't be parsed
+    """
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+    
+    def read_ifd(offset: int) -> dict:
+        count = struct.unpack_from(endian + 'H', tiff, offset)[0]
+        entries = {}
+        for i in range(count):
+            tag, typ, n, value = struct.unpack_from(endian + 'HHI4s', tiff, offset + 2 + 12 * i)
+            entries[tag] = (typ, n, value)
+        return entries
+    
+    def ascii_value(entries: dict, tag: int) -> Optional[str]:
+        entry = entries.get(tag)
+        if entry is None or entry[0] != 2:  # ASCII
+            return None
+        _, n, value = entry
+        raw = value[:n] if n <= 4 else tiff[struct.unpack(endian + 'I', value)[0]:][:n]
+        if len(raw) < n:
+            raise ValueError("EXIF value past the end of the read block")
+        return raw.split(b'\x00', 1)[0].decode('ascii', 'replace') or None
+    
+    ifd0 = read_ifd(struct.unpack_from(endian + 'I', tiff, 4)[0])
+    exif_ifd = {}
+    pointer = ifd0.get(_EXIF_IFD_POINTER)
+    if pointer is not None:
+        exif_ifd = read_ifd(struct.unpack(endian + 'I', pointer[2])[0])
+    return [
+        ascii_value(exif_ifd, 36867),  # DateTimeOriginal
+        ascii_value(exif_ifd, 36868),  # DateTimeDigitized
+        ascii_value(ifd0, 306),        # DateTime
+    ]
+
+
+def _fast_jpeg_exif_dates(file_path: str) -> Optional[List[Optional[str]]]:
+    """
+    Read a JPEG's EXIF date tags straight from its APP1 segment.
+    
+    Only the start of the file is read and no image decoder is created.
+    
+    Returns:
+        Same as _tiff_exif_dates ([] when the file has no EXIF segment),
+        or None if the header couldn't be parsed (use PIL instead)
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(_JPEG_HEADER_BYTES)
+        if head[:2] != b'\xff\xd8':
+            return None
+        pos = 2
+        while pos + 4 <= len(head):
+            if head[pos] != 0xFF:
+                return None
+            marker = head[pos + 1]
+            if marker == 0xFF:
+                # Fill byte before a marker
+                pos += 1
+                continue
+            if marker in (0xD9, 0xDA):
+                # End of image / start of scan: metadata segments come first
+                return []
+            length = struct.unpack_from('>H', head, pos + 2)[0]
+            if marker == 0xE1 and head[pos + 4:pos + 10] == b'Exif\x00\x00':
+                return _tiff_exif_dates(head[pos + 10:pos + 2 + length])
+            pos += 2 + length
+    except (OSError, struct.error, ValueError):
+        pass
+    return None
+
+
+def _pil_exif_dates(file_path: str) -> Optional[List[Optional[str]]]:
+    """Read the EXIF date tags through Pillow; None if the image has no EXIF."""
+    # Image.open only parses the header; getexif() reads the EXIF block
+    # without decoding any pixels
+    with Image.open(file_path) as img:
+        exif = img.getexif()
+        
+        if not exif:
+            return None
+        
+        # DateTimeOriginal/DateTimeDigitized live in the Exif sub-IFD,
+        # DateTime in IFD0
+        exif_ifd = exif.get_ifd(_EXIF_IFD_POINTER)
+        return [
+            exif_ifd.get(36867),  # DateTimeOriginal - when photo was taken
+            exif_ifd.get(36868),  # DateTimeDigitized - when digitized
+            exif.get(306),        # DateTime - modification time
+        ]
+
+
+def _read_exif_dates(file_path: str) -> Optional[List[Optional[str]]]:
+    """
+    Read an image's EXIF date tags: header-only for JPEGs, Pillow otherwise
+    (and for JPEGs the fast parser can't handle).
+    
+    Returns:
+        [DateTimeOriginal, DateTimeDigitized, DateTime] (None where absent),
+        or None/empty if the image has no EXIF
+    """
+    date_values = None
+    if os.path.splitext(file_path)[1].lower() in ('.jpg', '.jpeg'):
+        date_values = _fast_jpeg_exif_dates(file_path)
+    if date_values is None and HAS_PIL:
+        date_values = _pil_exif_dates(file_path)
+    return date_values
+
+
 def get_exif_date(file_path: str) -> Optional[datetime]:
     """
     Extract the original creation date from an image's EXIF metadata.
     
+    JPEGs are read with a header-only parser; other formats (and JPEGs it
+    can't handle) go through Pillow.
+    
     Args:
         file_path: Path to the image file
         
@@ -27,51 +171,37 @@ def get_exif_date(file_path: str) -> Optional[datetime]:
         datetime of the original creation date, or None if not available
     """
     try:
-        path = Path(file_path)
-        
         # Check if file type supports EXIF
-        if path.suffix.lower() not in EXIF_SUPPORTED_EXTENSIONS:
+        if os.path.splitext(file_path)[1].lower() not in EXIF_SUPPORTED_EXTENSIONS:
             return None
         
+        path = Path(file_path)
         if not path.exists():
             return None
         
-        from PIL import Image
-        from PIL.ExifTags import TAGS
-        
-        with Image.open(file_path) as img:
-            exif_data = img._getexif()
-            
-            if not exif_data:
-                logger.debug(f"No EXIF data found in {file_path}")
-                return None
-            
-            # Look for date tags in order of preference
-            date_tags = [
-                36867,  # DateTimeOriginal - when photo was taken
-                36868,  # DateTimeDigitized - when digitized
-                306,    # DateTime - modification time
-            ]
-            
-            for tag_id in date_tags:
-                if tag_id in exif_data:
-                    date_str = exif_data[tag_id]
-                    if date_str:
-                        # EXIF dates are typically in format: "YYYY:MM:DD HH:MM:SS"
-                        try:
-                            parsed_date = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-                            logger.debug(f"Extracted EXIF date from {path.name}: {parsed_date}")
-                            return parsed_date
-                        except ValueError:
-                            # Try alternative formats
-                            try:
-                                parsed_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-                                return parsed_date
-                            except ValueError:
-                                continue
-            
-            logger.debug(f"No date found in EXIF for {file_path}")
+        date_values = _read_exif_dates(file_path)
+        if not date_values:
+            logger.debug(f"No EXIF data found in {file_path}")
             return None
+        
+        # Date tags in order of preference
+        for date_str in date_values:
+            if date_str and isinstance(date_str, str):
+                # EXIF dates are typically in format: "YYYY:MM:DD HH:MM:SS"
+                try:
+                    parsed_date = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+                    logger.debug(f"Extracted EXIF date from {path.name}: {parsed_date}")
+                    return parsed_date
+                except ValueError:
+                    # Try alternative formats
+                    try:
+                        parsed_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+                        return parsed_date
+                    except ValueError:
+                        continue
+        
+        logger.debug(f"No date found in EXIF for {file_path}")
+        return None
             
     except Exception as e:
         logger.debug(f"Could not extract EXIF from {file_path}: {e}")
@@ -94,8 +224,11 @@ def get_best_date(file_path: str, created_date: Optional[str] = None,
     Returns:
         ISO format date string representing the best date
     """
-    # Try EXIF first for images
-    exif_date = get_exif_date(file_path)
+    # Try EXIF first for images (other types skip the lookup entirely)
+    if os.path.splitext(file_path)[1].lower() in EXIF_SUPPORTED_EXTENSIONS:
+        exif_date = get_exif_date(file_path)
+    else:
+        exif_date = None
     if exif_date:
         return exif_date.isoformat()
     
@@ -10,8 +10,41 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from .database import (
+    _FTS_TRIGGER_NAMES, _FTS_TRIGGERS, _json_dumps, _padded_in_params, _parse_tags_value,
+)
+
 logger = logging.getLogger(__name__)
 
+# IDs per DELETE/SELECT ... IN (...) statement
+_ID_CHUNK = 500
+
+# Above this many removals, files_fts is rebuilt once instead of deleting
+# each file's tokens through the files_ad trigger
+_FTS_REBUILD_THRESHOLD = 5000
+
+# Re-indexed files written per add_files_bulk transaction
+_REINDEX_FLUSH_SIZE = 256
+
+# Columns written by export_file_list in CSV format
+_EXPORT_COLUMNS = ('file_name', 'file_path', 'category', 'file_size',
+                   'label', 'tags', 'caption', 'created_date', 'modified_date')
+_EXPORT_TAGS_INDEX = _EXPORT_COLUMNS.index('tags')
+
+# SearchService used by reindex_files, created on first use. Kept apart from
+# search.search_service so pausing/cancelling normal indexing can't affect it.
+_search_service = None
+
+
+def _get_search_service():
+    """Return the re-index SearchService, creating it on first call."""
+    global _search_service
+    if _search_service is None:
+        # Imported here so loading file operations doesn't pull in the AI stack
+        from app.core.search import SearchService
+        _search_service = SearchService()
+    return _search_service
+
 
 class FileOperations:
     """Operations for managing indexed files."""
@@ -37,45 +70,41 @@ class FileOperations:
         Returns:
             Dict with 'removed' and 'errors' counts
         """
-        import sqlite3
-        
         stats = {'removed': 0, 'errors': 0}
         
         if not file_ids:
             return stats
         
         try:
-            with sqlite3.connect(self.file_index.db_path) as conn:
+            # The index's own connection has the embeddings database attached
+            with self.file_index._connect() as conn:
                 cursor = conn.cursor()
+                # One write transaction for every chunk
+                cursor.execute("BEGIN IMMEDIATE")
                 
-                for file_id in file_ids:
-                    try:
-                        # Delete from files table first (like clear_index does)
-                        cursor.execute("DELETE FROM files WHERE id = ?", (file_id,))
-                        if cursor.rowcount > 0:
-                            stats['removed'] += 1
-                        
-                        # Clean up FTS (ignore errors - may not exist for this ID)
-                        try:
-                            cursor.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
-                        except Exception:
-                            pass
-                        
-                        # Clean up embeddings (ignore errors - may not exist for this ID)
-                        try:
-                            cursor.execute("DELETE FROM embeddings WHERE file_id = ?", (file_id,))
-                        except Exception:
-                            pass
-                            
-                    except Exception as e:
-                        logger.error(f"Error removing file ID {file_id}: {e}")
-                        stats['errors'] += 1
+                rebuild_fts = len(file_ids) > _FTS_REBUILD_THRESHOLD
+                if rebuild_fts:
+                    cursor.execute("DROP TRIGGER IF EXISTS files_ad")
+                
+                for start in range(0, len(file_ids), _ID_CHUNK):
+                    placeholders, params = _padded_in_params(file_ids[start:start + _ID_CHUNK])
+                    # Delete from files table (the FTS index follows via trigger or rebuild)
+                    cursor.execute(f"DELETE FROM files WHERE id IN ({placeholders})", params)
+                    stats['removed'] += cursor.rowcount
+                    # Clean up embeddings (may not exist for these IDs)
+                    cursor.execute(f"DELETE FROM emb.embeddings WHERE file_id IN ({placeholders})", params)
+                
+                if rebuild_fts:
+                    # One pass over the remaining rows, then restore the sync triggers
+                    cursor.execute("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
+                    self.file_index._install_triggers(cursor, _FTS_TRIGGER_NAMES, _FTS_TRIGGERS)
                 
                 conn.commit()
                 logger.info(f"Removed {stats['removed']} files from index")
                 
         except Exception as e:
             logger.error(f"Error in remove_from_index: {e}")
+            stats['removed'] = 0
             stats['errors'] += len(file_ids)
         
         return stats
@@ -93,8 +122,23 @@ class FileOperations:
         """
         stats = {'updated': 0, 'not_found': 0, 'errors': 0}
         total = len(file_paths)
-        from app.core.search import SearchService
-        svc = SearchService()
+        svc = _get_search_service()
+        pending: List[Dict[str, Any]] = []
+        
+        def flush():
+            # Update in database (preserves existing fields if AI returns empty)
+            written = self.file_index.add_files_bulk(pending)
+            if written:
+                stats['updated'] += written
+            else:
+                # Batch failed (bad row, locked database): retry file by file
+                # so one failure doesn't discard the whole batch's AI results
+                for result in pending:
+                    if self.file_index.add_file(result):
+                        stats['updated'] += 1
+                    else:
+                        stats['errors'] += 1
+            pending.clear()
         
         for i, file_path in enumerate(file_paths):
             try:
@@ -114,11 +158,9 @@ class FileOperations:
                 if err:
                     raise RuntimeError(err)
 
-                # Update in database (preserves existing fields if AI returns empty)
-                if self.file_index.add_file(result):
-                    stats['updated'] += 1
-                else:
-                    stats['errors'] += 1
+                pending.append(result)
+                if len(pending) >= _REINDEX_FLUSH_SIZE:
+                    flush()
                     
             except Exception as e:
                 logger.error(f"Error reindexing {file_path}: {e}")
@@ -127,6 +169,9 @@ class FileOperations:
             if progress_callback and (i % 5 == 0 or i == total - 1):
                 progress_callback(i + 1, total)
         
+        if pending:
+            flush()
+        
         logger.info(f"Reindex complete: {stats['updated']} updated, {stats['not_found']} not found, {stats['errors']} errors")
         return stats
     
@@ -141,67 +186,44 @@ class FileOperations:
         Returns:
             Dict with 'updated' and 'errors' counts
         """
-        import sqlite3
-        import json
-        
         stats = {'updated': 0, 'errors': 0}
         
         if not file_ids or not new_tags:
             return stats
         
         try:
-            with sqlite3.connect(self.file_index.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.file_index._connect() as conn:
                 cursor = conn.cursor()
                 
-                for file_id in file_ids:
-                    try:
-                        # Get current tags
-                        cursor.execute("SELECT tags FROM files WHERE id = ?", (file_id,))
-                        row = cursor.fetchone()
-                        
-                        if row:
-                            current_tags = []
-                            if row['tags']:
-                                try:
-                                    # tags may be stored as JSON list or comma-separated string
-                                    from app.core.database import _parse_tags_value
-                                    current_tags = _parse_tags_value(row['tags']) or []
-                                    if not isinstance(current_tags, list):
-                                        current_tags = [current_tags] if current_tags else []
-                                except:
-                                    current_tags = [row['tags']] if row['tags'] else []
-                            
-                            # Merge tags (avoid duplicates)
-                            merged_tags = list(set(current_tags + new_tags))
-                            
-                            # Update in database
-                            cursor.execute(
-                                "UPDATE files SET tags = ? WHERE id = ?",
-                                (json.dumps(merged_tags), file_id)
-                            )
-                            
-                            # Update FTS index
-                            cursor.execute(
-                                """INSERT OR REPLACE INTO files_fts (rowid, file_name, file_path, category, ocr_text, caption, tags)
-                                   SELECT id, file_name, file_path, category, ocr_text, caption, tags FROM files WHERE id = ?""",
-                                (file_id,)
-                            )
-                            
-                            stats['updated'] += 1
-                        else:
-                            stats['errors'] += 1
-                            
-                    except Exception as e:
-                        logger.error(f"Error adding tags to file ID {file_id}: {e}")
+                # Current tags for every file, one IN (...) query per chunk
+                current: Dict[int, Any] = {}
+                for start in range(0, len(file_ids), _ID_CHUNK):
+                    placeholders, params = _padded_in_params(file_ids[start:start + _ID_CHUNK])
+                    cursor.execute(f"SELECT id, tags FROM files WHERE id IN ({placeholders})", params)
+                    current.update(cursor.fetchall())
+                
+                updates = []
+                for file_id in dict.fromkeys(file_ids):
+                    if file_id not in current:
                         stats['errors'] += 1
+                        continue
+                    # tags may be stored as JSON list or comma-separated string
+                    current_tags = _parse_tags_value(current[file_id]) or []
+                    # Merge tags (avoid duplicates), keeping the existing order
+                    merged_tags = list(dict.fromkeys(current_tags + list(new_tags)))
+                    updates.append((_json_dumps(merged_tags), file_id))
+                
+                # Update in database (the FTS index follows via trigger)
+                cursor.executemany("UPDATE files SET tags = ? WHERE id = ?", updates)
+                stats['updated'] = len(updates)
                 
                 conn.commit()
                 logger.info(f"Added tags to {stats['updated']} files")
                 
         except Exception as e:
             logger.error(f"Error in batch_add_tags: {e}")
-            stats['errors'] += len(file_ids)
+            stats['updated'] = 0
+            stats['errors'] = len(file_ids)
         
         return stats
     
@@ -215,21 +237,21 @@ class FileOperations:
         Returns:
             List of file paths
         """
-        import sqlite3
-        
         if not file_ids:
             return []
         
         paths = []
         try:
-            placeholders = ",".join(["?"] * len(file_ids))
-            with sqlite3.connect(self.file_index.db_path) as conn:
+            with self.file_index._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute(
-                    f"SELECT file_path FROM files WHERE id IN ({placeholders})",
-                    file_ids
-                )
-                paths = [row[0] for row in cursor.fetchall()]
+                # Chunked to stay under SQLite's bound-variable limit
+                for start in range(0, len(file_ids), _ID_CHUNK):
+                    placeholders, params = _padded_in_params(file_ids[start:start + _ID_CHUNK])
+                    cursor.execute(
+                        f"SELECT file_path FROM files WHERE id IN ({placeholders})",
+                        params
+                    )
+                    paths.extend(row[0] for row in cursor)
         except Exception as e:
             logger.error(f"Error getting file paths: {e}")
         
@@ -256,42 +278,45 @@ class FileOperations:
             if format == 'csv':
                 with open(output_path, 'w', newline='', encoding='utf-8') as f:
                     if files:
-                        # Determine columns
-                        columns = ['file_name', 'file_path', 'category', 'file_size', 
-                                   'label', 'tags', 'caption', 'created_date', 'modified_date']
+                        writer = csv.writer(f)
+                        writer.writerow(_EXPORT_COLUMNS)
                         
-                        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
-                        writer.writeheader()
+                        def rows():
+                            for file_data in files:
+                                row = [file_data.get(column) for column in _EXPORT_COLUMNS]
+                                # Convert tags list to string
+                                if isinstance(row[_EXPORT_TAGS_INDEX], list):
+                                    row[_EXPORT_TAGS_INDEX] = ', '.join(row[_EXPORT_TAGS_INDEX])
+                                yield row
                         
-                        for file_data in files:
-                            # Convert tags list to string
-                            row = dict(file_data)
-                            if isinstance(row.get('tags'), list):
-                                row['tags'] = ', '.join(row['tags'])
-                            writer.writerow(row)
+                        writer.writerows(rows())
                             
             else:  # txt format
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(f"Exported File List - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write("=" * 80 + "\n\n")
+                parts = [
+                    f"Exported File List - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+                    "=" * 80 + "\n\n",
+                ]
+                for file_data in files:
+                    parts.append(f"Name: {file_data.get('file_name', 'Unknown')}\n")
+                    parts.append(f"Path: {file_data.get('file_path', 'Unknown')}\n")
+                    parts.append(f"Category: {file_data.get('category', 'Unknown')}\n")
                     
-                    for file_data in files:
-                        f.write(f"Name: {file_data.get('file_name', 'Unknown')}\n")
-                        f.write(f"Path: {file_data.get('file_path', 'Unknown')}\n")
-                        f.write(f"Category: {file_data.get('category', 'Unknown')}\n")
-                        
-                        tags = file_data.get('tags', [])
-                        if isinstance(tags, list):
-                            tags = ', '.join(tags)
-                        if tags:
-                            f.write(f"Tags: {tags}\n")
+                    tags = file_data.get('tags', [])
+                    if isinstance(tags, list):
+                        tags = ', '.join(tags)
+                    if tags:
+                        parts.append(f"Tags: {tags}\n")
+                    
+                    if file_data.get('label'):
+                        parts.append(f"Label: {file_data['label']}\n")
+                    if file_data.get('caption'):
+                        parts.append(f"Caption: {file_data['caption']}\n")
                         
-                        if file_data.get('label'):
-                            f.write(f"Label: {file_data['label']}\n")
-                        if file_data.get('caption'):
-                            f.write(f"Caption: {file_data['caption']}\n")
-                            
-                        f.write("-" * 40 + "\n\n")
+                    parts.append("-" * 40 + "\n\n")
+                
+                # One write for the whole listing
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(''.join(parts))
             
             logger.info(f"Exported {len(files)} files to {output_path}")
             return True
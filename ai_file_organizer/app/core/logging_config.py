@@ -2,8 +2,10 @@
 Logging configuration for the application.
 """
 
+import atexit
 import logging
 import sys
+from logging.handlers import MemoryHandler, RotatingFileHandler
 from pathlib import Path
 from .settings import settings
 
@@ -30,15 +32,21 @@ def setup_logging():
     console_handler.setFormatter(console_formatter)
     root_logger.addHandler(console_handler)
     
-    # File handler
+    # File handler: rotated so the log can't grow without bound, and
+    # buffered so indexing threads don't each write+flush per record. The
+    # buffer is written out on errors, when full, and at exit.
     log_file = logs_dir / "ai_file_organizer.log"
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
+    rotating_handler = RotatingFileHandler(
+        log_file, maxBytes=10_000_000, backupCount=3, encoding='utf-8'
+    )
     file_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
-    file_handler.setFormatter(file_formatter)
+    rotating_handler.setFormatter(file_formatter)
+    file_handler = MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=rotating_handler)
+    file_handler.setLevel(logging.DEBUG)
     root_logger.addHandler(file_handler)
+    atexit.register(file_handler.flush)
     
     # Set specific logger levels
     logging.getLogger('PySide6').setLevel(logging.WARNING)
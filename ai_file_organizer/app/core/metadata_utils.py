@@ -3,15 +3,76 @@ File metadata extraction utilities.
 Extracts original creation dates from various file types.
 """
 import logging
+import multiprocessing
+import os
 import re
 import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 import xml.etree.ElementTree as ET
 
+# Importing exif_utils also registers the HEIC opener when available
+from .exif_utils import _read_exif_dates
+
+# Imported once here rather than on every extraction call
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+try:
+    from PyPDF2 import PdfReader
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
 logger = logging.getLogger(__name__)
 
+# batch_get_original_dates: paths per task sent to a worker, and the batch
+# size below which a process pool isn't worth starting
+_POOL_CHUNKSIZE = 64
+_POOL_MIN_PATHS = 256
+
+# Date patterns, compiled once (tried in order)
+_FILENAME_DATE_PATTERNS = [
+    # 2024-12-29 or 2024_12_29
+    re.compile(r'(\d{4})[-_](\d{2})[-_](\d{2})'),
+    # 20241229 (8 digits)
+    re.compile(r'(\d{4})(\d{2})(\d{2})'),
+    # Dec 29, 2024
+    re.compile(r'([A-Za-z]{3})\s+(\d{1,2}),?\s+(\d{4})'),
+]
+# strptime formats, tried in order when the likely one fails
+_EXIF_FORMATS = (
+    "%Y:%m:%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y:%m:%d",
+    "%Y-%m-%d",
+)
+_ISO_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+)
+# (length, separator after the year) -> EXIF format
+_EXIF_FORMAT_BY_SHAPE = {
+    (19, ':'): "%Y:%m:%d %H:%M:%S",
+    (19, '-'): "%Y-%m-%d %H:%M:%S",
+    (10, ':'): "%Y:%m:%d",
+    (10, '-'): "%Y-%m-%d",
+}
+# Timezone suffix of a PDF date (Z, +05'00')
+_PDF_TZ_RE = re.compile(r"[Z+']\d*'?")
+_OFFICE_CREATED_RE = re.compile(rb'<dcterms:created[^>]*>([^<]+)</dcterms:created>')
+_XMP_DATE_PATTERNS = [
+    re.compile(r'<xmp:CreateDate>([^<]+)</xmp:CreateDate>'),
+    re.compile(r'<photoshop:DateCreated>([^<]+)</photoshop:DateCreated>'),
+    re.compile(r'<exif:DateTimeOriginal>([^<]+)</exif:DateTimeOriginal>'),
+]
+
 
 def get_file_original_date(file_path: str) -> Optional[datetime]:
     """
@@ -37,7 +98,7 @@ def get_file_original_date(file_path: str) -> Optional[datetime]:
         elif ext == '.png':
             return _get_png_date(file_path)
         elif ext == '.webp':
-            return _get_webp_date(file_path)
+            return _get_exif_date(file_path)
         elif ext in {'.docx', '.xlsx', '.pptx'}:
             return _get_office_date(file_path)
         elif ext == '.pdf':
@@ -52,34 +113,40 @@ def get_file_original_date(file_path: str) -> Optional[datetime]:
         return None
 
 
+def batch_get_original_dates(paths: List[str], workers: Optional[int] = None) -> Dict[str, Optional[datetime]]:
+    """
+    Extract original dates for many files across a pool of worker processes.
+    
+    PDF and Office parsing is CPU-bound, so processes scale where threads
+    would serialize on the GIL. Small batches run in-process, where starting
+    a pool would cost more than it saves.
+    
+    Args:
+        paths: File paths to read
+        workers: Number of processes (default: CPU count)
+        
+    Returns:
+        Dict of path -> datetime (or None if no date was found)
+    """
+    if len(paths) < _POOL_MIN_PATHS:
+        return {path: get_file_original_date(path) for path in paths}
+    with multiprocessing.Pool(workers or os.cpu_count()) as pool:
+        # imap keeps input order, so results line up with paths
+        return dict(zip(paths, pool.imap(get_file_original_date, paths, chunksize=_POOL_CHUNKSIZE)))
+
+
 def _get_exif_date(file_path: str) -> Optional[datetime]:
     """Extract date from EXIF data (JPEG, TIFF, etc.)"""
     try:
-        from PIL import Image
+        # EXIF date tags in order of preference
+        for date_str in _read_exif_dates(file_path) or []:
+            if date_str:
+                parsed = _parse_exif_date(date_str)
+                if parsed:
+                    logger.debug(f"EXIF date from {Path(file_path).name}: {parsed}")
+                    return parsed
         
-        with Image.open(file_path) as img:
-            exif_data = img._getexif()
-            
-            if not exif_data:
-                return None
-            
-            # EXIF date tags in order of preference
-            date_tags = [
-                36867,  # DateTimeOriginal
-                36868,  # DateTimeDigitized
-                306,    # DateTime
-            ]
-            
-            for tag_id in date_tags:
-                if tag_id in exif_data:
-                    date_str = exif_data[tag_id]
-                    if date_str:
-                        parsed = _parse_exif_date(date_str)
-                        if parsed:
-                            logger.debug(f"EXIF date from {Path(file_path).name}: {parsed}")
-                            return parsed
-            
-            return None
+        return None
     except Exception as e:
         logger.debug(f"EXIF extraction failed for {file_path}: {e}")
         return None
@@ -87,10 +154,9 @@ def _get_exif_date(file_path: str) -> Optional[datetime]:
 
 def _get_png_date(file_path: str) -> Optional[datetime]:
     """Extract date from PNG metadata (tEXt chunks, XMP)."""
+    if not HAS_PIL:
+        return None
     try:
-        from PIL import Image
-        from PIL.PngImagePlugin import PngInfo
-        
         with Image.open(file_path) as img:
             # Check PNG text chunks
             info = img.info
@@ -120,58 +186,42 @@ def _get_png_date(file_path: str) -> Optional[datetime]:
         return None
 
 
-def _get_webp_date(file_path: str) -> Optional[datetime]:
-    """Extract date from WebP metadata."""
-    try:
-        from PIL import Image
-        
-        with Image.open(file_path) as img:
-            # WebP can contain EXIF data
-            exif = img.getexif()
-            if exif:
-                # DateTimeOriginal
-                if 36867 in exif:
-                    parsed = _parse_exif_date(exif[36867])
-                    if parsed:
-                        return parsed
-                # DateTime
-                if 306 in exif:
-                    parsed = _parse_exif_date(exif[306])
-                    if parsed:
-                        return parsed
-            
-            return None
-    except Exception as e:
-        logger.debug(f"WebP date extraction failed for {file_path}: {e}")
-        return None
-
-
 def _get_office_date(file_path: str) -> Optional[datetime]:
     """Extract creation date from Office documents (docx, xlsx, pptx)."""
     try:
         # Office files are ZIP archives with XML metadata
         with zipfile.ZipFile(file_path, 'r') as zf:
             # Core properties are in docProps/core.xml
-            if 'docProps/core.xml' in zf.namelist():
-                with zf.open('docProps/core.xml') as f:
-                    tree = ET.parse(f)
-                    root = tree.getroot()
-                    
-                    # Namespace for Dublin Core
-                    namespaces = {
-                        'dcterms': 'http://purl.org/dc/terms/',
-                        'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
-                    }
-                    
-                    # Try dcterms:created
-                    created = root.find('.//dcterms:created', namespaces)
-                    if created is not None and created.text:
-                        parsed = _parse_iso_date(created.text)
-                        if parsed:
-                            logger.debug(f"Office date from {Path(file_path).name}: {parsed}")
-                            return parsed
+            try:
+                data = zf.read('docProps/core.xml')
+            except KeyError:
+                return None
+        
+        # Usual case: the conventional dcterms prefix, found without parsing
+        match = _OFFICE_CREATED_RE.search(data)
+        if match:
+            created_text = match.group(1).decode('utf-8', 'replace')
+        else:
+            # Other prefixes: resolve the namespace with a full parse
+            root = ET.fromstring(data)
             
-            return None
+            # Namespace for Dublin Core
+            namespaces = {
+                'dcterms': 'http://purl.org/dc/terms/',
+                'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
+            }
+            
+            # Try dcterms:created
+            created = root.find('.//dcterms:created', namespaces)
+            created_text = created.text if created is not None else None
+        
+        if created_text:
+            parsed = _parse_iso_date(created_text)
+            if parsed:
+                logger.debug(f"Office date from {Path(file_path).name}: {parsed}")
+                return parsed
+        
+        return None
     except Exception as e:
         logger.debug(f"Office date extraction failed for {file_path}: {e}")
         return None
@@ -179,9 +229,10 @@ def _get_office_date(file_path: str) -> Optional[datetime]:
 
 def _get_pdf_date(file_path: str) -> Optional[datetime]:
     """Extract creation date from PDF files."""
+    if not HAS_PYPDF2:
+        logger.debug("PyPDF2 not installed, skipping PDF date extraction")
+        return None
     try:
-        from PyPDF2 import PdfReader
-        
         reader = PdfReader(file_path)
         info = reader.metadata
         
@@ -196,9 +247,6 @@ def _get_pdf_date(file_path: str) -> Optional[datetime]:
                             logger.debug(f"PDF date from {Path(file_path).name}: {parsed}")
                             return parsed
         
-        return None
-    except ImportError:
-        logger.debug("PyPDF2 not installed, skipping PDF date extraction")
         return None
     except Exception as e:
         logger.debug(f"PDF date extraction failed for {file_path}: {e}")
@@ -208,11 +256,6 @@ def _get_pdf_date(file_path: str) -> Optional[datetime]:
 def _get_video_date(file_path: str) -> Optional[datetime]:
     """Extract creation date from video files using file metadata."""
     try:
-        from PIL import Image
-        
-        # Some video formats store creation date in a way Pillow can read
-        # This is limited but catches some cases
-        
         # Try to get date from filename as fallback for videos
         return _get_filename_date(file_path)
     except Exception as e:
@@ -230,17 +273,8 @@ def _get_filename_date(file_path: str) -> Optional[datetime]:
     """
     filename = Path(file_path).stem
     
-    patterns = [
-        # 2024-12-29 or 2024_12_29
-        r'(\d{4})[-_](\d{2})[-_](\d{2})',
-        # 20241229 (8 digits)
-        r'(\d{4})(\d{2})(\d{2})',
-        # Dec 29, 2024
-        r'([A-Za-z]{3})\s+(\d{1,2}),?\s+(\d{4})',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, filename)
+    for pattern in _FILENAME_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             groups = match.groups()
             try:
@@ -258,15 +292,21 @@ def _get_filename_date(file_path: str) -> Optional[datetime]:
 
 def _parse_exif_date(date_str: str) -> Optional[datetime]:
     """Parse EXIF date format: YYYY:MM:DD HH:MM:SS"""
-    formats = [
-        "%Y:%m:%d %H:%M:%S",
-        "%Y-%m-%d %H:%M:%S",
-        "%Y:%m:%d",
-        "%Y-%m-%d",
-    ]
-    for fmt in formats:
+    date_str = date_str.strip()
+    # Every format has a 4-digit year then ':' or '-'
+    if date_str[4:5] not in (':', '-'):
+        return None
+    # Common case: the string's shape picks the one format to try
+    fmt = _EXIF_FORMAT_BY_SHAPE.get((len(date_str), date_str[4]))
+    if fmt:
         try:
-            return datetime.strptime(date_str.strip(), fmt)
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            pass
+    strptime = datetime.strptime
+    for fmt in _EXIF_FORMATS:
+        try:
+            return strptime(date_str, fmt)
         except ValueError:
             continue
     return None
@@ -277,21 +317,38 @@ def _parse_iso_date(date_str: str) -> Optional[datetime]:
     try:
         # Handle various ISO formats
         date_str = date_str.strip()
+        # Every format starts with YYYY-
+        if date_str[4:5] != '-':
+            return None
+        
+        # fromisoformat parses in C, including fractions and UTC offsets;
+        # keep the wall-clock time, as stripping the offset below does
+        try:
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00')).replace(tzinfo=None)
+        except ValueError:
+            pass
+        
         # Remove timezone info for simplicity
         if 'Z' in date_str:
             date_str = date_str.replace('Z', '')
         if '+' in date_str:
             date_str = date_str.split('+')[0]
         
-        formats = [
-            "%Y-%m-%dT%H:%M:%S",
-            "%Y-%m-%dT%H:%M:%S.%f",
-            "%Y-%m-%d %H:%M:%S",
-            "%Y-%m-%d",
-        ]
-        for fmt in formats:
+        # Pick the likely format from the separators before trying them all
+        if 'T' in date_str:
+            fmt = "%Y-%m-%dT%H:%M:%S.%f" if '.' in date_str else "%Y-%m-%dT%H:%M:%S"
+        elif ' ' in date_str:
+            fmt = "%Y-%m-%d %H:%M:%S"
+        else:
+            fmt = "%Y-%m-%d"
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            pass
+        strptime = datetime.strptime
+        for fmt in _ISO_FORMATS:
             try:
-                return datetime.strptime(date_str, fmt)
+                return strptime(date_str, fmt)
             except ValueError:
                 continue
     except Exception:
@@ -307,7 +364,7 @@ def _parse_pdf_date(date_str: str) -> Optional[datetime]:
             date_str = date_str[2:]
         
         # Remove timezone info
-        date_str = re.sub(r"[Z+']\d*'?", '', date_str)
+        date_str = _PDF_TZ_RE.sub('', date_str)
         
         # Try various lengths
         if len(date_str) >= 14:
@@ -323,13 +380,8 @@ def _parse_xmp_date(xmp_data: str) -> Optional[datetime]:
     """Parse date from XMP XML data."""
     try:
         # Look for common date fields in XMP
-        patterns = [
-            r'<xmp:CreateDate>([^<]+)</xmp:CreateDate>',
-            r'<photoshop:DateCreated>([^<]+)</photoshop:DateCreated>',
-            r'<exif:DateTimeOriginal>([^<]+)</exif:DateTimeOriginal>',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, xmp_data)
+        for pattern in _XMP_DATE_PATTERNS:
+            match = pattern.search(xmp_data)
             if match:
                 parsed = _parse_iso_date(match.group(1))
                 if parsed:
@@ -359,9 +411,11 @@ def _parse_flexible_date(date_str: str) -> Optional[datetime]:
         "%d-%m-%Y %H:%M:%S",
         "%B %d, %Y",  # "December 29, 2024"
     ]
+    date_str = date_str.strip()
+    strptime = datetime.strptime
     for fmt in formats:
         try:
-            return datetime.strptime(date_str.strip(), fmt)
+            return strptime(date_str, fmt)
         except ValueError:
             continue
     
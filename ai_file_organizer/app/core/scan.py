@@ -3,13 +3,21 @@ File scanning and discovery logic.
 """
 
 import logging
+import os
 from pathlib import Path
-from typing import List, Dict, Any
-from .categorize import get_file_metadata
+from typing import Dict, Any, Iterator, List
+from .categorize import _suffix, get_file_metadata_batch
 
 
 logger = logging.getLogger(__name__)
 
+# Names and extensions scanning never picks up
+_SYSTEM_FILES = frozenset({
+    'thumbs.db', 'desktop.ini', '.ds_store',
+    'icon\r', 'icon\n', 'icon\r\n'
+})
+_TEMP_EXTENSIONS = frozenset({'.tmp', '.temp', '.bak', '.swp', '.swo'})
+
 
 def scan_directory(source_path: Path, max_files: int = 1000) -> List[Dict[str, Any]]:
     """
@@ -35,30 +43,28 @@ def scan_directory(source_path: Path, max_files: int = 1000) -> List[Dict[str, A
         
         logger.info(f"Starting scan of directory: {source_path}")
         
-        # Walk through directory recursively
-        for file_path in source_path.rglob('*'):
-            if len(files) >= max_files:
+        # Walk through directory recursively (directories are skipped - we only move files)
+        entries = []
+        for entry in _iter_file_entries(source_path):
+            if len(entries) >= max_files:
                 logger.warning(f"Reached maximum file limit ({max_files})")
                 break
             
-            # Skip directories for now (we only move files)
-            if file_path.is_dir():
-                continue
-            
             # Skip hidden files and system files
-            if _should_skip_file(file_path):
+            if _should_skip_name(entry.name):
                 continue
-            
-            try:
-                metadata = get_file_metadata(file_path)
-                if metadata:
-                    # Include full source path for files in subfolders
-                    metadata['source_path'] = str(file_path)
-                    files.append(metadata)
-                    
-            except Exception as e:
-                logger.error(f"Error processing file {file_path}: {e}")
+            # The cloud-file check needs a Path, and only does anything on Windows
+            if os.name == 'nt' and _is_onedrive_cloud_file(Path(entry.path)):
                 continue
+            
+            entries.append(entry)
+        
+        # Fetch metadata in parallel, reusing each entry's cached stat
+        for entry, metadata in zip(entries, get_file_metadata_batch(entries)):
+            if metadata:
+                # Include full source path for files in subfolders
+                metadata['source_path'] = entry.path
+                files.append(metadata)
         
         logger.info(f"Scan completed. Found {len(files)} files.")
         return files
@@ -68,6 +74,37 @@ def scan_directory(source_path: Path, max_files: int = 1000) -> List[Dict[str, A
         return files
 
 
+def _iter_file_entries(directory: Path) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield os.DirEntry objects for every non-directory under a folder.
+    
+    Uses os.scandir so each entry's type and stat information is fetched once
+    and cached on the entry. Symlinked folders are not followed.
+    
+    Args:
+        directory: Root directory to walk
+    """
+    pending = [str(directory)]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.debug(f"Could not scan {current}: {e}")
+            continue
+        
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        pending.append(entry.path)
+                    continue
+            except OSError:
+                pass
+            yield entry
+
+
 def _is_onedrive_cloud_file(file_path: Path) -> bool:
     """
     Check if a file is an OneDrive cloud-only (placeholder) file.
@@ -111,42 +148,31 @@ def _is_onedrive_cloud_file(file_path: Path) -> bool:
         return False
 
 
-def _should_skip_file(file_path: Path) -> bool:
+def _should_skip_name(name: str) -> bool:
     """
-    Determine if a file should be skipped during scanning.
+    Determine if a file should be skipped during scanning, from its name alone.
     
     Note: Exclusion patterns from settings are NOT checked here.
     Files can be indexed even if they match exclusion patterns.
     Exclusion patterns only prevent files from being MOVED during organization.
+    OneDrive cloud-only files are checked separately by the caller.
     
     Args:
-        file_path: Path to the file
+        name: File name (no directory)
         
     Returns:
         True if file should be skipped
     """
     # Skip hidden files
-    if file_path.name.startswith('.'):
+    if name.startswith('.'):
         return True
     
     # Skip system files
-    system_files = {
-        'thumbs.db', 'desktop.ini', '.ds_store', 
-        'icon\r', 'icon\n', 'icon\r\n'
-    }
-    if file_path.name.lower() in system_files:
+    if name.lower() in _SYSTEM_FILES:
         return True
     
     # Skip temporary files
-    temp_extensions = {'.tmp', '.temp', '.bak', '.swp', '.swo'}
-    if file_path.suffix.lower() in temp_extensions:
-        return True
-    
-    # Skip OneDrive cloud-only files (not downloaded locally)
-    if _is_onedrive_cloud_file(file_path):
-        return True
-    
-    return False
+    return _suffix(name).lower() in _TEMP_EXTENSIONS
 
 
 def get_directory_stats(source_path: Path) -> Dict[str, Any]:
@@ -167,15 +193,25 @@ def get_directory_stats(source_path: Path) -> Dict[str, Any]:
         total_dirs = 0
         total_size = 0
         
-        for item in source_path.rglob('*'):
-            if item.is_file():
-                total_files += 1
-                try:
-                    total_size += item.stat().st_size
-                except:
-                    pass
-            elif item.is_dir():
-                total_dirs += 1
+        # Aggregate straight off os.scandir so each item's type and size come
+        # from the entry's cached stat instead of three lookups per path
+        pending = [str(source_path)]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file():
+                                total_files += 1
+                                total_size += entry.stat().st_size
+                            elif entry.is_dir():
+                                total_dirs += 1
+                                if not entry.is_symlink():
+                                    pending.append(entry.path)
+                        except OSError:
+                            pass
+            except OSError:
+                continue
         
         return {
             "total_files": total_files,
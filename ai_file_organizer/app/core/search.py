@@ -15,15 +15,23 @@ from .vision import analyze_image, analyze_text, gpt_vision_fallback, describe_i
 from .settings import settings
 from .text_extract import extract_file_text, get_supported_text_formats
 import os
-from .embeddings import embed_text
+from .embeddings import embed_text, batch_embed_texts, EMBED_MODEL
 import hashlib
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
 # Parallel processing settings
 MAX_CONCURRENT_AI_REQUESTS = 50  # Tier 2: 5,000 RPM allows 50-80 safely
 
+# Texts sent to the embedding model per request while indexing a folder
+EMBED_BATCH_SIZE = 32
+
 # Media file extensions that count against the index limit
 MEDIA_EXTENSIONS = {
     # Images
@@ -105,6 +113,20 @@ class SearchService:
             # On error, allow indexing to not block users
             return {'allowed': True, 'remaining': 999999, 'limit': 999999, 'plan': 'unknown', 'error': str(e)}
     
+    def _flush_embeddings(self, pending: List[tuple]) -> None:
+        """Embed queued (file_id, text) pairs in one request and store the vectors."""
+        if not pending:
+            return
+        try:
+            vectors = batch_embed_texts([text for _, text in pending])
+            self.index.batch_upsert_embeddings([
+                (file_id, f"ollama:{EMBED_MODEL}", vec)
+                for (file_id, _), vec in zip(pending, vectors) if vec
+            ])
+        except Exception as e:
+            logger.debug(f"Embedding batch failed: {e}")
+        pending.clear()
+    
     def _update_index_usage(self, media_count: int) -> bool:
         """
         Update the index usage after successfully indexing media files.
@@ -440,6 +462,8 @@ class SearchService:
             skipped_count = 0
             completed = 0
             cancelled = False
+            # (file_id, text) waiting to be embedded in one batch
+            pending_embeddings: List[tuple] = []
             
             logger.info(f"Processing {total} files with {MAX_CONCURRENT_AI_REQUESTS} concurrent workers")
             
@@ -502,7 +526,7 @@ class SearchService:
                             if result.get('has_ocr', False):
                                 ocr_count += 1
                             
-                            # Create embedding (quick operation)
+                            # Queue the embedding; vectors are fetched in batches
                             try:
                                 rec = self.index.get_file_by_path(str(file_path))
                                 if rec:
@@ -516,9 +540,10 @@ class SearchService:
                                     if rec.get('ocr_text'):
                                         text_parts.append(rec['ocr_text'])
                                     text_blob = ' '.join([t for t in text_parts if t])[:5000]
-                                    vec = embed_text(text_blob)
-                                    if vec:
-                                        self.index.upsert_embedding(rec['id'], 'ollama:nomic-embed-text', vec)
+                                    if text_blob:
+                                        pending_embeddings.append((rec['id'], text_blob))
+                                        if len(pending_embeddings) >= EMBED_BATCH_SIZE:
+                                            self._flush_embeddings(pending_embeddings)
                             except Exception:
                                 pass
                         
@@ -538,6 +563,9 @@ class SearchService:
                         completed += 1
                         logger.error(f"Error in future result: {e}")
             
+            # Embed whatever is left (including files indexed before a cancel)
+            self._flush_embeddings(pending_embeddings)
+            
             if cancelled:
                 logger.info(f"Indexing cancelled after {indexed_count} files ({skipped_count} skipped)")
                 # Still update usage for files that WERE indexed before cancellation
@@ -630,27 +658,21 @@ class SearchService:
                             qtext += " " + " ".join(filters['tags'])
                         qvec = embed_text(qtext)
                         if qvec:
-                            # simple in-Python cosine over all embeddings
-                            import math
-                            embs = self.index.get_all_embeddings()
-                            scored: List[tuple[float, int]] = []
-                            qnorm = math.sqrt(sum(x*x for x in qvec)) or 1.0
-                            for e in embs:
-                                vec = e.get('vector') or []
-                                if not vec or len(vec) != len(qvec):
-                                    continue
-                                dot = sum(a*b for a,b in zip(qvec, vec))
-                                vnorm = math.sqrt(sum(x*x for x in vec)) or 1.0
-                                cos = dot/(qnorm*vnorm)
-                                scored.append((cos, e['file_id']))
-                            scored.sort(reverse=True)
-                            top_ids = [fid for _, fid in scored[:limit]]
-                            sem_results = self.index.get_files_by_ids(top_ids)
+                            # Stored vectors come back L2-normalized, so cosine
+                            # is a dot product with the normalized query
+                            file_ids, matrix = self.index.get_embedding_matrix(len(qvec))
+                            qnorm = sum(x*x for x in qvec) ** 0.5 or 1.0
+                            query_vec = [x / qnorm for x in qvec]
+                            if np is not None and isinstance(matrix, np.ndarray):
+                                sims = (matrix @ np.asarray(query_vec, dtype=np.float32)).tolist()
+                            else:
+                                sims = [sum(a*b for a, b in zip(query_vec, vec)) for vec in matrix]
+                            scored = sorted(zip(sims, file_ids), reverse=True)[:limit]
+                            sem_results = self.index.get_files_by_ids([fid for _, fid in scored])
                             # attach semantic score as rank
-                            for (cos, fid) in scored[:limit]:
-                                for r in sem_results:
-                                    if r['id'] == fid:
-                                        r['rank'] = cos*10
+                            cos_by_id = {fid: cos for cos, fid in scored}
+                            for r in sem_results:
+                                r['rank'] = cos_by_id[r['id']]*10
                 except Exception:
                     pass
 
@@ -4,7 +4,10 @@ Application settings and configuration management.
 
 import json
 import os
+import re
+import sys
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -90,18 +93,23 @@ class Settings:
             pass
     
     def _load_default_categories(self) -> Dict[str, List[str]]:
-        """Load default category mappings from resources."""
+        """Load default category mappings from resources.
+
+        Category names are interned, so the labels handed out by the
+        categorizer can be compared and hashed by identity.
+        """
         try:
             # Try to load from resources first
             resource_path = Path(__file__).parent.parent.parent / "resources" / "category_defaults.json"
             if resource_path.exists():
                 with open(resource_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    return {sys.intern(category): extensions
+                            for category, extensions in json.load(f).items()}
         except Exception:
             pass
         
         # Fallback to hardcoded defaults
-        return {
+        defaults = {
             "Documents/PDFs": [".pdf"],
             "Documents/Word": [".doc", ".docx", ".rtf"],
             "Documents/Text": [".txt", ".md"],
@@ -117,15 +125,64 @@ class Settings:
             "Code": [".py", ".js", ".ts"],
             "Misc": []
         }
+        return {sys.intern(category): extensions for category, extensions in defaults.items()}
     
     def _get_mime_fallbacks(self) -> Dict[str, str]:
-        """Get MIME type fallback mappings."""
-        return {
+        """Get MIME type fallback mappings (categories interned)."""
+        fallbacks = {
             "image/": "Images/Photos",
             "video/": "Videos", 
             "audio/": "Audio/Recordings",
             "application/pdf": "Documents/PDFs"
         }
+        return {prefix: sys.intern(category) for prefix, category in fallbacks.items()}
+    
+    @cached_property
+    def extension_index(self) -> Dict[str, str]:
+        """Reverse of category_map: extension -> category.
+
+        Built once so categorizing a file is a single dict lookup. If an
+        extension is listed under several categories, the first one wins,
+        same as scanning category_map in order.
+        """
+        index: Dict[str, str] = {}
+        for category, extensions in self.category_map.items():
+            for ext in extensions:
+                index.setdefault(ext, category)
+        return index
+    
+    @cached_property
+    def trusted_extensions(self) -> frozenset:
+        """Extensions whose category (and MIME type) can be taken from the name
+        alone, so the file's magic bytes never need to be read.
+
+        Everything in the category map except generic containers like .txt,
+        whose content could be anything, and names shared by unrelated formats
+        (.ts is both TypeScript and MPEG transport stream).
+        """
+        ambiguous = {'.bin', '.dat', '.txt', '.ts'}
+        return frozenset(ext for ext in self.extension_index if ext not in ambiguous)
+    
+    @cached_property
+    def mime_fallback_items(self) -> tuple:
+        """mime_fallbacks as (prefix, category) pairs, in definition order; the first matching prefix wins."""
+        return tuple(self.mime_fallbacks.items())
+    
+    @cached_property
+    def mime_fallback_pattern(self) -> "re.Pattern":
+        """All MIME fallback prefixes as one anchored alternation.
+
+        Group i matches the prefix of mime_fallback_items[i - 1]. Alternatives
+        are tried in order, so the first matching prefix still wins.
+        """
+        return re.compile('|'.join(f'({re.escape(prefix)})' for prefix, _ in self.mime_fallback_items))
+    
+    def rebuild_category_index(self) -> None:
+        """Drop the cached lookup tables above so they are rebuilt from the
+        current category_map and mime_fallbacks on next use."""
+        for name in ('extension_index', 'trusted_extensions',
+                     'mime_fallback_items', 'mime_fallback_pattern'):
+            self.__dict__.pop(name, None)
     
     def _get_default_exclusions(self) -> List[str]:
         """Get default exclusion patterns for files/folders that should not be organized."""
@@ -393,6 +393,11 @@ class MainWindow(QMainWindow):
         # This prevents UNIQUE constraint errors from orphaned records
         QTimer.singleShot(2000, self._run_background_db_cleanup)
         
+        # Refresh database planner statistics and trim the WAL every few hours
+        self._db_maintenance_timer = QTimer(self)
+        self._db_maintenance_timer.timeout.connect(self._run_background_db_maintenance)
+        self._db_maintenance_timer.start(4 * 60 * 60 * 1000)
+        
         # Flag to track if onboarding has been shown this session
         self._onboarding_shown_this_session = False
         
@@ -8547,3 +8552,15 @@ Move Plan Summary:
             
         except Exception as e:
             logger.error(f"Failed to start database cleanup: {e}")
+
+    def _run_background_db_maintenance(self):
+        """Run periodic database maintenance (ANALYZE, WAL checkpoint) in background."""
+        try:
+            from app.core.database import file_index
+            
+            import threading
+            maintenance_thread = threading.Thread(target=file_index.maintenance, daemon=True)
+            maintenance_thread.start()
+            
+        except Exception as e:
+            logger.error(f"Failed to start database maintenance: {e}")
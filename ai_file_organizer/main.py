@@ -491,4 +491,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # Worker processes (metadata_utils.batch_get_original_dates) start here
+    # in a bundled app; let them run their task instead of the UI
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
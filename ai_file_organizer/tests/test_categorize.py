@@ -152,6 +152,87 @@ class TestCategorization:
         finally:
             temp_path.unlink(missing_ok=True)
 
+    def test_magic_signatures_match_filetype(self):
+        """Test that the fast magic-byte check agrees with filetype."""
+        import filetype
+        from app.core.categorize import _guess_mime
+        
+        headers = [b'%PDF-1.4', b'\xff\xd8\xff\xe0', b'GIF89a', b'ID3\x03', b'PK\x03\x04' + b'\x00' * 40, b'plain text']
+        for header in headers:
+            with tempfile.NamedTemporaryFile(delete=False) as f:
+                f.write(header)
+                temp_path = Path(f.name)
+            
+            try:
+                kind = filetype.guess(str(temp_path))
+                assert _guess_mime(str(temp_path)) == (kind.mime if kind else None)
+            finally:
+                temp_path.unlink(missing_ok=True)
+        
+        print("✅ Magic-byte detection matches filetype")
+
+    def test_mime_fallback_categories(self):
+        """Test MIME prefix fallbacks, first matching prefix wins."""
+        from app.core.categorize import _category_for_mime
+        from app.core.settings import settings
+        
+        for mime_type in ['image/png', 'video/mp4', 'audio/ogg', 'application/pdf', 'text/plain']:
+            expected = next((category for prefix, category in settings.mime_fallback_items
+                             if mime_type.startswith(prefix)), None)
+            assert _category_for_mime(mime_type) == expected
+        assert _category_for_mime('image/png') == 'Images/Photos'
+        assert _category_for_mime('text/plain') is None
+        print("✅ MIME fallbacks categorized")
+
+    def test_reload_settings(self):
+        """Test that category map changes apply after reload_settings()."""
+        from app.core import categorize
+        from app.core.settings import settings
+        
+        assert categorize._categorize_by_extension('.xyzzy') is None
+        settings.category_map.setdefault('Code', []).append('.xyzzy')
+        try:
+            categorize.reload_settings()
+            assert categorize._categorize_by_extension('.xyzzy') == 'Code'
+        finally:
+            settings.category_map['Code'].remove('.xyzzy')
+            categorize.reload_settings()
+        assert categorize._categorize_by_extension('.xyzzy') is None
+        print("✅ Settings reloaded into categorizer")
+
+    def test_categorize_names(self):
+        """Test batch categorization agrees with categorize_file."""
+        from app.core.categorize import categorize_file, categorize_names
+        
+        names = ['report.pdf', 'photo.JPG', 'dir/song.mp3', 'notes', 'archive.xyz', '.hidden']
+        assert categorize_names(names) == [categorize_file(Path(n)) for n in names]
+        assert categorize_names(iter(['a.pdf'])) == ['Documents/PDFs']
+        print("✅ Batch name categorization")
+
+    def test_batch_survives_bad_file(self, monkeypatch):
+        """Test one failing file comes back as an error entry, not an empty batch."""
+        from app.core import categorize
+
+        guess_mime = categorize._guess_mime
+
+        def failing_guess(path_str):
+            if path_str.endswith('bad.bin'):
+                raise ValueError("boom")
+            return guess_mime(path_str)
+
+        monkeypatch.setattr(categorize, '_guess_mime', failing_guess)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [Path(tmp) / name for name in ('a.bin', 'bad.bin', 'c.bin')]
+            for path in paths:
+                path.write_bytes(b'\x00\x01data')
+
+            results = categorize.get_file_metadata_batch(paths)
+
+        assert [m['name'] for m in results] == ['a.bin', 'bad.bin', 'c.bin']
+        assert results[1]['error'] == 'boom'
+        assert 'error' not in results[0] and 'error' not in results[2]
+        print("✅ Batch metadata survives a failing file")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
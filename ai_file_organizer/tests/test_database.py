@@ -139,8 +139,19 @@ class TestFileIndex:
         assert any('vacation' in r.get('file_name', '').lower() or 
                    'vacation' in str(r.get('label', '')).lower() 
                    for r in results)
+        # Plain dicts that callers may annotate
+        results[0]['rank'] = 1.0
+        assert isinstance(results[0], dict)
         print("✅ Search finds matching files")
     
+    def test_search_history(self, temp_db):
+        """Test that queued search history is visible once read back."""
+        temp_db.search_files('first')
+        temp_db.search_files('second')
+        history = temp_db.get_search_history(limit=10)
+        assert {h['query'] for h in history} == {'first', 'second'}
+        print("✅ Search history written by the background logger")
+    
     def test_clear_all(self, temp_db):
         """Test clearing all files from database."""
         # Add some files
@@ -211,6 +222,166 @@ class TestFileIndex:
         assert count == 7
         print(f"✅ File count correct: {count}")
 
+    def test_add_files_bulk(self, temp_db):
+        """Test adding a batch of files in one transaction."""
+        files = [{
+            'source_path': f'C:/test/bulk_{i}.txt',
+            'name': f'bulk_{i}.txt',
+            'extension': '.txt',
+            'size': 100 + i,
+            'category': 'Documents',
+            'tags': ['bulk', f'item{i}'],
+        } for i in range(25)]
+        
+        assert temp_db.add_files_bulk(files) == 25
+        assert temp_db.get_file_count() == 25
+        result = temp_db.get_file_by_path('C:/test/bulk_3.txt')
+        assert result['file_size'] == 103
+        assert result['tags'] == ['bulk', 'item3']
+        assert len(temp_db.search_files('item3')) == 1
+        print("✅ Bulk add indexed all files")
+
+    def test_reindex_reuses_original_date(self, temp_db, tmp_path, monkeypatch):
+        """Test that an unchanged file keeps its original date without re-extraction."""
+        import app.core.metadata_utils as metadata_utils
+        photo = tmp_path / 'IMG_20200101_beach.txt'
+        photo.write_text('x')
+        file_data = {'source_path': str(photo), 'name': photo.name, 'size': photo.stat().st_size}
+        temp_db.add_files_bulk([dict(file_data)])
+        assert temp_db.get_file_by_path(str(photo))['original_date'] == '2020-01-01T00:00:00'
+        
+        def fail(path):
+            raise AssertionError("date re-extracted for an unchanged file")
+        monkeypatch.setattr(metadata_utils, 'get_file_original_date', fail)
+        temp_db.add_files_bulk([dict(file_data)])
+        assert temp_db.get_file_by_path(str(photo))['original_date'] == '2020-01-01T00:00:00'
+        print("✅ Unchanged file reused its stored original date")
+
+    def test_tag_filter(self, temp_db):
+        """Test advanced search tag filters, including legacy comma-separated tags."""
+        temp_db.add_files_bulk([
+            {'source_path': 'C:/test/receipt.pdf', 'name': 'receipt.pdf', 'tags': ['finance', 'receipt']},
+            {'source_path': 'C:/test/photo.jpg', 'name': 'photo.jpg', 'tags': ['holiday']},
+            {'source_path': 'C:/test/old.pdf', 'name': 'old.pdf', 'tags': 'finance, legacy'},
+        ])
+        
+        names = {r['file_name'] for r in temp_db.search_files_advanced([], {'tags': ['finance']})}
+        assert names == {'receipt.pdf', 'old.pdf'}
+        
+        file_id = temp_db.get_file_by_path('C:/test/photo.jpg')['id']
+        temp_db.update_file_field(file_id, 'tags', ['finance'])
+        names = {r['file_name'] for r in temp_db.search_files_advanced([], {'tags': ['finance']})}
+        assert 'photo.jpg' in names
+        print("✅ Tag filter matched normalized and legacy tags")
+
+    def test_advanced_search_punctuation(self, temp_db):
+        """Test that punctuated terms are matched through FTS without errors."""
+        temp_db.add_files_bulk([
+            {'source_path': '/docs/c++ notes.txt', 'name': 'c++ notes.txt'},
+            {'source_path': '/docs/q3-report.pdf', 'name': 'q3-report.pdf'},
+        ])
+
+        names = {r['file_name'] for r in temp_db.search_files_advanced(['c++'], {})}
+        assert names == {'c++ notes.txt'}
+        names = {r['file_name'] for r in temp_db.search_files_advanced(['q3-rep'], {})}
+        assert names == {'q3-report.pdf'}
+        assert temp_db.search_files_advanced(['"unmatched'], {}) == []
+        print("✅ Punctuated terms searched through FTS")
+
+    def test_advanced_search_filters_see_all_matches(self, temp_db):
+        """Test that filters apply to every FTS match, not just the most relevant ones."""
+        temp_db.add_files_bulk(
+            [{'source_path': f'/pics/photo {i}.jpg', 'name': f'photo {i}.jpg', 'tags': ['photo']}
+             for i in range(600)]
+            + [{'source_path': '/pics/zz.jpg', 'name': 'zz.jpg', 'tags': ['beach', 'photo']}]
+        )
+
+        results = temp_db.search_files_advanced(['photo'], {'tags': ['beach']}, 50)
+        assert [r['file_name'] for r in results] == ['zz.jpg']
+        print("✅ Filtered search found a low-ranked match")
+
+    def test_schema_version(self, temp_db):
+        """Test that the schema version is stamped and reopening keeps working."""
+        import sqlite3
+        from app.core.database import FileIndex, SCHEMA_VERSION
+        temp_db.add_files_bulk([{'source_path': 'C:/test/a.txt', 'name': 'a.txt', 'tags': ['alpha']}])
+        temp_db.close()
+        
+        with sqlite3.connect(temp_db.db_path) as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        
+        reopened = FileIndex(temp_db.db_path)
+        assert len(reopened.search_files('alpha')) == 1
+        names = {r['file_name'] for r in reopened.search_files_advanced([], {'tags': ['alpha']})}
+        assert names == {'a.txt'}
+        print(f"✅ Schema version {SCHEMA_VERSION} stamped and reused")
+
+    def test_missing_fts_is_rebuilt(self, temp_db):
+        """Test that search works while a missing FTS index is rebuilt in the background."""
+        import sqlite3
+        from app.core.database import FileIndex
+        temp_db.add_files_bulk([{'source_path': 'C:/test/heal.txt', 'name': 'heal.txt'}])
+        temp_db.close()
+        with sqlite3.connect(temp_db.db_path) as conn:
+            conn.execute("DROP TABLE files_fts")
+        
+        reopened = FileIndex(temp_db.db_path)
+        assert [r['file_name'] for r in reopened.search_files_advanced(['heal'], {})] == ['heal.txt']
+        with reopened._fts_rebuild_lock:
+            pass
+        assert reopened._fts_ok
+        assert len(reopened.search_files('heal')) == 1
+        print("✅ Missing FTS index rebuilt in the background")
+
+    def test_iter_search_files(self, temp_db):
+        """Test streaming search results that decode fields on access."""
+        temp_db.add_files_bulk([{
+            'source_path': f'C:/test/stream_{i}.txt',
+            'name': f'stream_{i}.txt',
+            'tags': ['stream'],
+            'metadata': {'index': i},
+        } for i in range(100)])
+        
+        results = temp_db.iter_search_files('stream', limit=100)
+        first = next(results)
+        assert first['tags'] == ['stream']
+        assert isinstance(first.copy(), dict)
+        assert sum(1 for _ in results) == 99
+        print("✅ Streaming search yielded all results")
+
+    def test_embedding_roundtrip(self, temp_db):
+        """Test that embeddings are stored packed and read back as floats."""
+        temp_db.add_files_bulk([{'source_path': 'C:/test/emb.txt', 'name': 'emb.txt'}])
+        file_id = temp_db.get_file_by_path('C:/test/emb.txt')['id']
+        
+        temp_db.upsert_embedding(file_id, 'test-model', [0.5, -0.25, 1.0])
+        embs = temp_db.get_all_embeddings()
+        assert len(embs) == 1
+        assert embs[0]['dim'] == 3
+        assert list(embs[0]['vector']) == [0.5, -0.25, 1.0]
+        assert [e['file_id'] for e in temp_db.iter_embeddings()] == [file_id]
+        
+        file_ids, matrix = temp_db.get_embedding_matrix(3)
+        assert file_ids == [file_id]
+        assert abs(sum(x * x for x in matrix[0]) - 1.0) < 1e-5
+        assert temp_db.get_embedding_matrix(4)[0] == []
+        print("✅ Embedding stored and decoded")
+
+    def test_reindex_keeps_embedding(self, temp_db):
+        """Test that re-adding a file updates it in place and keeps its embedding."""
+        file_data = {'source_path': 'C:/test/keep.txt', 'name': 'keep.txt', 'tags': ['keep']}
+        temp_db.add_files_bulk([file_data])
+        file_id = temp_db.get_file_by_path('C:/test/keep.txt')['id']
+        temp_db.upsert_embedding(file_id, 'test-model', [1.0, 0.0])
+        
+        temp_db.add_files_bulk([{'source_path': 'C:/test/keep.txt', 'name': 'keep.txt', 'size': 42}])
+        result = temp_db.get_file_by_path('C:/test/keep.txt')
+        assert result['id'] == file_id
+        assert result['file_size'] == 42
+        assert [e['file_id'] for e in temp_db.get_all_embeddings()] == [file_id]
+        assert len(temp_db.search_files('keep')) == 1
+        print("✅ Re-index kept row id and embedding")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
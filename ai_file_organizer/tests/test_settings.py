@@ -71,6 +71,31 @@ class TestSettings:
         print(f"✅ Category map loaded: {len(categories)} categories")
         print(f"   Categories: {list(categories.keys())}")
     
+    def test_extension_index(self):
+        """Test that the extension index mirrors the category map."""
+        from app.core.settings import Settings
+        s = Settings()
+        
+        index = s.extension_index
+        for category, extensions in s.category_map.items():
+            for ext in extensions:
+                assert ext in index
+        assert index.get('.pdf') == 'Documents/PDFs'
+        assert '.nonexistent' not in index
+        print(f"✅ Extension index has {len(index)} extensions")
+    
+    def test_category_names_interned(self):
+        """Test that category labels are interned for identity comparison."""
+        import sys
+        from app.core.settings import Settings
+        s = Settings()
+        
+        for category in s.extension_index.values():
+            assert category is sys.intern(category)
+        for _, category in s.mime_fallback_items:
+            assert category is sys.intern(category)
+        print("✅ Category names are interned")
+    
     def test_pinned_paths(self):
         """Test pinned paths functionality."""
         from app.core.settings import Settings